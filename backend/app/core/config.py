@@ -6,22 +6,117 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "mongodb://localhost:27017"
     database_name: str = "emolit_db"
+    # Connection pool, per worker process: size max_pool_size so that
+    # workers * max_pool_size stays under the server's connection limit
+    mongo_max_pool_size: int = 50
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: int = 300000
+    mongo_wait_queue_timeout_ms: int = 2000
+    mongo_server_selection_timeout_ms: int = 5000
+    # Comma-separated, e.g. "zstd,snappy,zlib"; zstd and snappy need the
+    # zstandard / python-snappy packages
+    mongo_compressors: str = ""
+    mongo_read_preference: str = "primary"
+    # Server-side operation limits (maxTimeMS) by route type
+    mongo_max_time_ms: int = 5000
+    mongo_list_max_time_ms: int = 10000
+    mongo_report_max_time_ms: int = 15000
+    
+    # Write-behind buffer for progress counters
+    progress_write_behind_enabled: bool = True
+    progress_flush_interval_seconds: float = 1.0
+    progress_flush_max_users: int = 500
     
     # Redis
     redis_url: str = "redis://localhost:6379"
     
+    # Background jobs; "redis" shares the queue across workers via redis_url,
+    # "memory" keeps it in-process
+    job_broker: str = "memory"
+    job_concurrency: int = 4
+    job_max_attempts: int = 3
+    job_backoff_seconds: float = 2.0
+    job_max_backoff_seconds: float = 60.0
+    job_poll_max_wait_seconds: float = 30.0
+    # Replies still unfinished after this long are treated as lost jobs and
+    # queued again; the memory broker drops its queue on restart
+    job_stale_seconds: float = 300.0
+    # Default for POST /journal/entries when the request omits async_reply
+    journal_async_replies: bool = False
+    
     # JWT
     secret_key: str = "your-secret-key-change-this-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Authenticated user cache; with trust_token_claims, tokens carrying
+    # id/email/active/tz claims skip the user lookup entirely
+    user_cache_size: int = 10000
+    user_cache_ttl_seconds: int = 30
+    auth_trust_token_claims: bool = False
+    # Password hashing pool; raising bcrypt_rounds rehashes on next login
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_queue_depth: int = 64
     
     # OpenRouter (for Claude/AI responses)
     openrouter_api_key: Optional[str] = None
     openrouter_base_url: str = "https://openrouter.ai/api/v1"
+    # Circuit breaker: open when the failure (429/5xx/network) or slow-call
+    # rate over the last window calls crosses its threshold, then probe again
+    # after open_seconds. Calls slower than slow_call_seconds also shrink the
+    # adaptive concurrency limit, which grows back up to openrouter_max_connections.
+    openrouter_slow_call_seconds: float = 10.0
+    openrouter_breaker_failure_rate: float = 0.5
+    openrouter_breaker_slow_call_rate: float = 0.8
+    openrouter_breaker_window: int = 20
+    openrouter_breaker_min_calls: int = 5
+    openrouter_breaker_open_seconds: float = 30.0
+    openrouter_concurrency_initial: int = 10
+    openrouter_concurrency_min: int = 1
+    
+    # Emotion model inference
+    # Load models in the background at startup instead of on first request
+    model_warmup_on_startup: bool = True
+    # Backend: "transformers" (fp32), "quantized" (dynamic int8) or "onnx"
+    inference_backend: str = "transformers"
+    onnx_intra_op_threads: int = 0
+    onnx_inter_op_threads: int = 1
+    inference_batch_max_size: int = 16
+    inference_batch_max_wait_ms: float = 10.0
+    inference_workers: int = 1
+    inference_queue_depth: int = 64
+    inference_retry_after_seconds: int = 2
+    inference_chunk_tokens: int = 510
+    inference_chunk_overlap_tokens: int = 64
+    inference_max_chunks: int = 16
+    analyze_batch_max_items: int = 64
+    
+    # Crisis phrase list (one phrase per line); defaults are used when unset
+    crisis_keywords_file: Optional[str] = None
+    crisis_keywords_reload_seconds: float = 30.0
+    
+    # Analysis result cache (Redis tier uses redis_url)
+    analysis_cache_size: int = 1024
+    analysis_cache_ttl_seconds: int = 3600
+    analysis_cache_redis_enabled: bool = False
+    
+    # Outbound HTTP: one pooled keep-alive client per upstream
+    http_connect_timeout_seconds: float = 5.0
+    http_keepalive_expiry_seconds: float = 60.0
+    # Needs the h2 package
+    http2_enabled: bool = False
+    openrouter_max_connections: int = 20
+    openrouter_timeout_seconds: float = 30.0
+    azure_max_connections: int = 10
+    azure_timeout_seconds: float = 30.0
     
     # Azure AI Services
     azure_speech_key: Optional[str] = None
     azure_speech_region: Optional[str] = None
+    # Speech access tokens last 10 minutes; refresh in the background after
+    # refresh_seconds and stop using them after ttl_seconds
+    azure_speech_token_ttl_seconds: float = 540.0
+    azure_speech_token_refresh_seconds: float = 480.0
     azure_translator_key: Optional[str] = None
     azure_translator_region: Optional[str] = None
     
@@ -41,5 +136,7 @@ class Settings(BaseSettings):
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = False
+        # model_warmup_on_startup is a setting, not a pydantic attribute
+        protected_namespaces = ("settings_",)
 
 settings = Settings()
@@ -1,18 +1,48 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.database import get_database
 from app.core.config import settings
+from app.utils.cache import LRUCache
+from app.utils.worker_pool import WorkerPool
+from bson import ObjectId
+import time
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing; hashes below the configured cost are upgraded on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds
+)
+
+# bcrypt is CPU-bound, so it runs on its own small pool off the event loop
+password_pool = WorkerPool(
+    "bcrypt",
+    max_workers=settings.password_hash_workers,
+    max_queue_depth=settings.password_hash_queue_depth
+)
 
 # JWT token handling
 security = HTTPBearer()
 
+# Claims login puts in the token for AUTH_TRUST_TOKEN_CLAIMS: the user fields
+# routes read from get_current_user (tz is used for local calendar days)
+TRUSTED_CLAIMS = ("email", "active", "tz")
+
+# Short-lived cache of user documents, keyed by user id and token issue time
+# so each of a user's live tokens (phone and web) keeps its own entry
+user_cache = LRUCache(
+    max_size=settings.user_cache_size,
+    ttl_seconds=settings.user_cache_ttl_seconds
+)
+# User id -> monotonic time its cached entries were invalidated; entries
+# loaded before then are stale whichever token they belong to
+_invalidated_at: Dict[str, float] = {}
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -21,6 +51,18 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bcrypt pool"""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a new hash if the stored one needs an upgrade"""
+    return await password_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the bcrypt pool"""
+    return await password_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -29,7 +71,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
@@ -41,15 +83,24 @@ def verify_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> dict:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
+def invalidate_cached_user(user_id: str):
+    """Drop every cached copy of a user after it is updated or deactivated"""
+    now = time.monotonic()
+    if user_cache.ttl_seconds:
+        # Anything invalidated more than a TTL ago has expired from the cache
+        for stale_id in [uid for uid, at in _invalidated_at.items() if now - at > user_cache.ttl_seconds]:
+            del _invalidated_at[stale_id]
+    _invalidated_at[str(user_id)] = now
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_credentials(credentials: HTTPAuthorizationCredentials) -> dict:
+    credentials_exception = _credentials_exception()
     
     try:
         payload = jwt.decode(credentials.credentials, settings.secret_key, algorithms=[settings.algorithm])
@@ -59,14 +110,55 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
+    return payload
+
+async def _load_user(payload: dict) -> dict:
+    """Fetch the user for a decoded token, using the cache when it is fresh"""
+    credentials_exception = _credentials_exception()
+    user_id = payload["sub"]
+    issued_at = payload.get("iat")
+    
+    key = (user_id, issued_at)
+    
+    cached = user_cache.get(key)
+    if cached is not None and cached[0] > _invalidated_at.get(user_id, float("-inf")):
+        return dict(cached[1])
+    
+    # Taken before the read so an invalidation during it marks this copy stale
+    loaded_at = time.monotonic()
     db = await get_database()
-    from bson import ObjectId
     try:
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, max_time_ms=settings.mongo_max_time_ms)
     except:
         raise credentials_exception
     
     if user is None:
         raise credentials_exception
     
-    return user
+    user_cache.set(key, (loaded_at, user))
+    return dict(user)
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> dict:
+    """Get current authenticated user"""
+    payload = _decode_credentials(credentials)
+    
+    # Tokens carrying the claims routes rely on skip the database entirely;
+    # older tokens without all of them still load the user
+    if settings.auth_trust_token_claims and all(claim in payload for claim in TRUSTED_CLAIMS):
+        if not payload["active"]:
+            raise _credentials_exception()
+        try:
+            user_id = ObjectId(payload["sub"])
+        except Exception:
+            raise _credentials_exception()
+        return {"_id": user_id, "email": payload["email"], "is_active": True, "timezone": payload["tz"]}
+    
+    return await _load_user(payload)
+
+async def get_current_user_record(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> dict:
+    """Get the full user document for the authenticated user"""
+    return await _load_user(_decode_credentials(credentials))
@@ -1,23 +1,128 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel, monitoring
 from app.core.config import settings
-from typing import Optional
+from app.utils.metrics import Histogram
+from typing import Any, Dict, List, Optional
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHECKOUT_WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Connection pool counters for sizing maxPoolSize against the worker count"""
+
+    def __init__(self):
+        self.open_connections = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_wait_ms = Histogram(CHECKOUT_WAIT_BUCKETS_MS)
+        # Motor runs each operation on one executor thread, so check-out
+        # start and finish for a request arrive on the same thread
+        self._started = threading.local()
+        self._lock = threading.Lock()
+
+    def _observe_wait(self):
+        started_at = getattr(self._started, "at", None)
+        if started_at is not None:
+            self.checkout_wait_ms.observe((time.perf_counter() - started_at) * 1000)
+            self._started.at = None
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        logger.warning(f"MongoDB connection pool cleared for {event.address}")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_check_out_started(self, event):
+        self._started.at = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._observe_wait()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self._observe_wait()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool occupancy and check-out wait histogram"""
+        return {
+            "max_pool_size": settings.mongo_max_pool_size,
+            "min_pool_size": settings.mongo_min_pool_size,
+            "open_connections": self.open_connections,
+            "checked_out": self.checked_out,
+            "max_checked_out": self.max_checked_out,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "checkout_wait_ms": self.checkout_wait_ms.snapshot(),
+        }
 
 class MongoDB:
     client: Optional[AsyncIOMotorClient] = None
+    database: Optional[AsyncIOMotorDatabase] = None
 
 db = MongoDB()
+pool_monitor = PoolMonitor()
 
 async def get_database():
     """Get database instance"""
-    return db.client[settings.database_name]
+    if db.database is None:
+        db.database = db.client[settings.database_name]
+    return db.database
+
+def client_options() -> Dict[str, Any]:
+    """Pool, timeout and read settings for AsyncIOMotorClient"""
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "waitQueueTimeoutMS": settings.mongo_wait_queue_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "readPreference": settings.mongo_read_preference,
+        "event_listeners": [pool_monitor],
+    }
+    if settings.mongo_compressors:
+        options["compressors"] = settings.mongo_compressors
+    return options
 
 async def connect_to_mongo():
     """Create database connection"""
-    db.client = AsyncIOMotorClient(settings.database_url)
+    db.client = AsyncIOMotorClient(settings.database_url, **client_options())
     # Test connection (Atlas can fail with TLS errors due to network/firewall/DNS)
     try:
         await db.client.admin.command('ping')
         print("Connected to MongoDB")
+        await ensure_indexes(db.client[settings.database_name])
     except Exception as e:
         # Don't crash the whole app on Mongo connection failure — log and continue
         # This allows frontend/dev work to continue while Mongo issues are investigated.
@@ -28,9 +133,50 @@ async def connect_to_mongo():
         except Exception:
             pass
         db.client = None
+        db.database = None
 
 async def close_mongo_connection():
     """Close database connection"""
     if db.client:
         db.client.close()
+        db.client = None
+        db.database = None
         print("Disconnected from MongoDB")
+
+# Indexes required by the queries in app/routes, per collection
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "journal_entries": [
+        # Keyset listing by user newest first; _id breaks created_at ties
+        IndexModel(
+            [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="user_created_at_id"
+        ),
+        # Stale reply sweep; entries saved with an inline reply have no status
+        IndexModel(
+            [("ai_response_status", ASCENDING), ("updated_at", ASCENDING)],
+            name="ai_response_status_updated_at",
+            sparse=True
+        ),
+    ],
+    "daily_rollups": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], name="user_day_unique", unique=True),
+    ],
+    "user_progress": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+}
+
+async def ensure_indexes(database) -> Dict[str, List[str]]:
+    """Create the declared indexes; safe to run on every startup"""
+    created = {}
+    for collection, indexes in INDEXES.items():
+        try:
+            created[collection] = await database[collection].create_indexes(indexes)
+        except Exception as e:
+            # e.g. a unique index over existing duplicates; keep serving
+            logger.error(f"Could not create indexes on {collection}: {str(e)}")
+    logger.info(f"Ensured MongoDB indexes: {created}")
+    return created
@@ -1,11 +1,22 @@
 from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
-from app.database import connect_to_mongo, close_mongo_connection
+from pymongo.errors import ExecutionTimeout
+from app.database import connect_to_mongo, close_mongo_connection, pool_monitor
 from app.routes import auth, journal, emotions, progress, quiz
 from app.core.config import settings
+from app.core.security import password_pool, user_cache
+from app.utils.worker_pool import QueueFullError
+from app.services.model_registry import model_registry
+from app.services.progress_buffer import progress_buffer
+from app.services.http_clients import http_clients
+from app.services.azure_speech import speech_token_provider
+from app.services.jobs import job_queue
+from app.services.response_generator import openrouter_guard
 import logging
 
 # Configure logging
@@ -17,8 +28,24 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting EmoLit Backend...")
     await connect_to_mongo()
+    http_clients.open()
+    job_queue.start()
+    reply_sweeper = asyncio.create_task(journal.sweep_stale_replies())
+    # Load and warm the models in the background so startup is not blocked.
+    # After a pre-fork preload (gunicorn.conf.py) this only runs the warm-up
+    # inference, since the weights are already inherited from the master.
+    if settings.model_warmup_on_startup:
+        asyncio.get_running_loop().run_in_executor(None, model_registry.warm_up)
     yield
     # Shutdown
+    reply_sweeper.cancel()
+    await asyncio.gather(reply_sweeper, return_exceptions=True)
+    await journal.close_reply_streams()
+    await job_queue.close()
+    await progress_buffer.close()
+    await model_registry.close()
+    await http_clients.close()
+    password_pool.shutdown()
     await close_mongo_connection()
     logger.info("Shutting down EmoLit Backend...")
 
@@ -50,6 +77,24 @@ app.add_middleware(
 # Security
 security = HTTPBearer()
 
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request, exc: QueueFullError):
+    """Shed load when the inference queue is full"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service busy, please retry shortly"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(ExecutionTimeout)
+async def mongo_timeout_handler(request, exc: ExecutionTimeout):
+    """A query exceeded its maxTimeMS limit"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database operation timed out, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(journal.router, prefix="/api/journal", tags=["Journal"])
@@ -65,6 +110,33 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "emolit-backend"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Report whether the emotion models are loaded"""
+    models = model_registry.readiness()
+    # Without warm-up the models load on first use, so not_loaded is expected
+    lazy = models["status"] == "not_loaded" and not settings.model_warmup_on_startup
+    ready = models["status"] == "ready" or lazy
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "models": models}
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Cache and pool counters for capacity tuning"""
+    return {
+        "user_cache": user_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "progress_buffer": progress_buffer.stats(),
+        "mongo_pool": pool_monitor.stats(),
+        "http_clients": http_clients.stats(),
+        "azure_speech_tokens": speech_token_provider.stats(),
+        "journal_reply_stream": journal.stream_stats(),
+        "jobs": await job_queue.stats(),
+        "openrouter": openrouter_guard.stats()
+    }
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
@@ -4,10 +4,11 @@ from app.database import get_database
 from app.models.user import User
 from app.models.schemas import UserCreate, UserResponse, Token, UserLogin
 from app.core.security import (
-    verify_password, 
-    get_password_hash, 
+    verify_and_update_password,
+    get_password_hash_async,
     create_access_token,
-    get_current_user
+    invalidate_cached_user,
+    get_current_user_record
 )
 from app.core.config import settings
 from bson import ObjectId
@@ -20,7 +21,7 @@ async def register(user: UserCreate):
     db = await get_database()
     
     # Check if user already exists
-    existing_user = await db.users.find_one({"email": user.email})
+    existing_user = await db.users.find_one({"email": user.email}, max_time_ms=settings.mongo_max_time_ms)
     if existing_user:
         raise HTTPException(
             status_code=400,
@@ -28,7 +29,7 @@ async def register(user: UserCreate):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     user_data = {
         "email": user.email,
         "password_hash": hashed_password,
@@ -72,14 +73,29 @@ async def register(user: UserCreate):
 async def login(user: UserLogin):
     """Login user"""
     db = await get_database()
-    db_user = await db.users.find_one({"email": user.email})
+    db_user = await db.users.find_one({"email": user.email}, max_time_ms=settings.mongo_max_time_ms)
     
-    if not db_user or not verify_password(user.password, db_user["password_hash"]):
+    if not db_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
+    verified, new_hash = await verify_and_update_password(user.password, db_user["password_hash"])
+    if not verified:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password"
+        )
+    
+    # Upgrade hashes made with an older bcrypt cost factor
+    if new_hash:
+        await db.users.update_one(
+            {"_id": db_user["_id"]},
+            {"$set": {"password_hash": new_hash, "updated_at": datetime.utcnow()}}
+        )
+        invalidate_cached_user(str(db_user["_id"]))
+    
     if not db_user.get("is_active", True):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -88,14 +104,19 @@ async def login(user: UserLogin):
     
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": str(db_user["_id"])},
+        data={
+            "sub": str(db_user["_id"]),
+            "email": db_user["email"],
+            "active": db_user.get("is_active", True),
+            "tz": db_user.get("timezone") or "UTC"
+        },
         expires_delta=access_token_expires
     )
     
     return Token(access_token=access_token, token_type="bearer")
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(current_user: dict = Depends(get_current_user)):
+async def read_users_me(current_user: dict = Depends(get_current_user_record)):
     """Get current user info"""
     return UserResponse(
         id=str(current_user["_id"]),
@@ -1,16 +1,24 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from app.services.emotion_analyzer import EmotionAnalyzer
+from app.utils.worker_pool import QueueFullError
+from app.services.model_registry import get_emotion_analyzer, model_registry
 from app.models.schemas import EmotionAnalysisResponse, EmotionWord
+from app.core.security import get_current_user
+from app.core.config import settings
 from pydantic import BaseModel
-from typing import List
+from typing import List, Dict, Any
+import json
 import random
 
 router = APIRouter()
-emotion_analyzer = EmotionAnalyzer()
 
 class TextAnalysisRequest(BaseModel):
     text: str
 
+class BatchAnalysisRequest(BaseModel):
+    texts: List[str]
+
 # Sample emotion words data
 EMOTION_WORDS_DATA = [
     {
@@ -46,7 +54,10 @@ EMOTION_WORDS_DATA = [
 ]
 
 @router.post("/analyze-text", response_model=dict)
-async def analyze_text_emotions(request: TextAnalysisRequest):
+async def analyze_text_emotions(
+    request: TextAnalysisRequest,
+    emotion_analyzer: EmotionAnalyzer = Depends(get_emotion_analyzer),
+):
     """Analyze emotions in text"""
     try:
         analysis = await emotion_analyzer.analyze_text(request.text)
@@ -54,8 +65,87 @@ async def analyze_text_emotions(request: TextAnalysisRequest):
             "success": True,
             "analysis": analysis
         }
+    except QueueFullError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+def _batch_item(index: int, analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape one analyze-batch result"""
+    if "error" in analysis:
+        return {"index": index, "success": False, "error": analysis["error"]}
+    return {"index": index, "success": True, "analysis": analysis}
+
+async def _analyze_in_order(texts: List[str], emotion_analyzer: EmotionAnalyzer) -> List[Dict[str, Any]]:
+    """Analyze non-empty texts together and slot per-item errors back in order"""
+    valid = [index for index, text in enumerate(texts) if text.strip()]
+    analyses = await emotion_analyzer.analyze_many([texts[index] for index in valid]) if valid else []
+    by_index = dict(zip(valid, analyses))
+    return [by_index.get(index, {"error": "Text is empty"}) for index in range(len(texts))]
+
+@router.post("/analyze-batch")
+async def analyze_batch_emotions(
+    request: BatchAnalysisRequest,
+    stream: bool = False,
+    current_user: dict = Depends(get_current_user),
+    emotion_analyzer: EmotionAnalyzer = Depends(get_emotion_analyzer),
+):
+    """Analyze emotions in many texts; stream=true returns NDJSON as results are ready"""
+    texts = request.texts
+    if not texts:
+        raise HTTPException(status_code=400, detail="No texts provided")
+    if len(texts) > settings.analyze_batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.analyze_batch_max_items} texts per request"
+        )
+    
+    if stream:
+        async def ndjson_lines():
+            size = settings.inference_batch_max_size
+            for start in range(0, len(texts), size):
+                part = texts[start:start + size]
+                try:
+                    results = await _analyze_in_order(part, emotion_analyzer)
+                except QueueFullError:
+                    results = [{"error": "Service busy, please retry shortly"}] * len(part)
+                for offset, analysis in enumerate(results):
+                    yield json.dumps(_batch_item(start + offset, analysis), default=str) + "\n"
+        
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+    
+    # Slices of one inference batch each, so a full request neither exceeds
+    # the batch size nor needs the whole queue to itself
+    size = settings.inference_batch_max_size
+    try:
+        results = []
+        for start in range(0, len(texts), size):
+            results.extend(await _analyze_in_order(texts[start:start + size], emotion_analyzer))
+    except QueueFullError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    
+    return {
+        "success": True,
+        "results": [_batch_item(index, analysis) for index, analysis in enumerate(results)],
+        "count": len(results)
+    }
+
+@router.get("/models")
+async def get_model_stats():
+    """Get load time and memory use of the shared analysis models"""
+    return model_registry.stats()
+
+@router.get("/metrics")
+async def get_inference_metrics(
+    emotion_analyzer: EmotionAnalyzer = Depends(get_emotion_analyzer),
+):
+    """Get batching histograms and cache counters for tuning inference"""
+    return {
+        "batcher": emotion_analyzer.batcher.stats(),
+        "cache": emotion_analyzer.cache.stats()
+    }
 
 @router.get("/word-of-the-day", response_model=EmotionWord)
 async def get_word_of_the_day():
@@ -1,13 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.database import get_database
+from app.core.config import settings
 from app.models.user import JournalEntry
 from app.core.security import get_current_user
 from app.services.emotion_analyzer import EmotionAnalyzer
+from app.utils.worker_pool import QueueFullError
+from app.services.model_registry import get_emotion_analyzer
 from app.services.response_generator import ResponseGenerator
+from app.services.progress_buffer import progress_buffer
+from app.services.rollups import record_entry
+from app.services.jobs import job_queue
+from app.utils.cache import LRUCache
+from app.utils.metrics import Histogram
 from pydantic import BaseModel
 from bson import ObjectId
+import asyncio
+import base64
+import json
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,78 +28,366 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # Initialize services
-emotion_analyzer = EmotionAnalyzer()
 response_generator = ResponseGenerator()
 
+MAX_PAGE_SIZE = 100
+REPLY_POLL_INTERVAL_SECONDS = 0.5
+PREVIEW_LENGTH = 200
+# Reply job states that still expect a job to finish them
+UNFINISHED_REPLY_STATUSES = ["pending", "running", "retrying"]
+
+def make_preview(content: str) -> str:
+    """List-view excerpt of an entry"""
+    return content[:PREVIEW_LENGTH] + "..." if len(content) > PREVIEW_LENGTH else content
+
+# Fields needed by the list view. Only the preview crosses the wire: it is
+# stored at insert time, and built server-side for older entries.
+LIST_PROJECTION = {
+    "title": 1,
+    "preview": {"$ifNull": ["$preview", {"$cond": [
+        {"$gt": [{"$strLenCP": "$content"}, PREVIEW_LENGTH]},
+        {"$concat": [{"$substrCP": ["$content", 0, PREVIEW_LENGTH]}, "..."]},
+        "$content"
+    ]}]},
+    "created_at": 1,
+    "mood_score": 1,
+    "risk_level": 1,
+    "detected_emotions": 1
+}
+
+entry_count_cache = LRUCache(max_size=10000, ttl_seconds=60)
+
+# Streaming replies: time to the first event and to the first reply token
+STREAM_LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+reply_stream_ttfb_ms = Histogram(STREAM_LATENCY_BUCKETS_MS)
+reply_stream_ttft_ms = Histogram(STREAM_LATENCY_BUCKETS_MS)
+# Reply tasks for streamed entries, held so they keep running after a
+# client disconnects
+_reply_streams = set()
+
 class JournalEntryCreate(BaseModel):
     title: Optional[str] = None
     content: str
     is_private: bool = True
 
+async def _save_entry(
+    db,
+    current_user: dict,
+    entry: JournalEntryCreate,
+    emotion_analysis: dict,
+    ai_response: Optional[dict],
+    ai_response_status: Optional[str] = None,
+) -> dict:
+    """Insert an analyzed entry and update rollups and progress"""
+    user_id = str(current_user["_id"])
+    entry_data = {
+        "user_id": user_id,
+        "title": entry.title,
+        "content": entry.content,
+        "preview": make_preview(entry.content),
+        "emotion_analysis": emotion_analysis,
+        "detected_emotions": emotion_analysis.get('wheel_emotions', []),
+        "mood_score": emotion_analysis.get('mood_score', 5),
+        "risk_level": emotion_analysis.get('risk_level', 'low'),
+        "ai_response": ai_response,
+        "is_private": entry.is_private,
+        "word_count": len(entry.content.split()),
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+    if ai_response_status:
+        entry_data["ai_response_status"] = ai_response_status
+    
+    await db.journal_entries.insert_one(entry_data)
+    
+    entry_count_cache.delete(user_id)
+    
+    # Keep the dashboard's daily rollup current
+    try:
+        await record_entry(db, current_user, entry_data)
+    except Exception as e:
+        logger.error(f"Error updating daily rollup: {str(e)}")
+    
+    # Update user progress
+    await progress_buffer.record(db, user_id, xp=5, journal_entries=1)
+    
+    return entry_data
+
+async def _generate_reply_job(payload: dict, final_attempt: bool):
+    """Background job: generate the AI reply for an entry, store it on the entry and return it"""
+    db = await get_database()
+    entry_id = ObjectId(payload["entry_id"])
+    entry = await db.journal_entries.find_one({"_id": entry_id}, {"content": 1, "emotion_analysis": 1})
+    if entry is None:
+        return
+    
+    await db.journal_entries.update_one(
+        {"_id": entry_id},
+        {"$set": {"ai_response_status": "running", "updated_at": datetime.utcnow()}}
+    )
+    try:
+        # The last attempt falls back to a canned reply instead of failing
+        ai_response = await response_generator.generate_response(
+            entry["content"], entry.get("emotion_analysis") or {}, raise_errors=not final_attempt
+        )
+    except Exception as e:
+        await db.journal_entries.update_one(
+            {"_id": entry_id},
+            {"$set": {"ai_response_status": "retrying", "ai_response_error": str(e), "updated_at": datetime.utcnow()}}
+        )
+        raise
+    
+    await db.journal_entries.update_one(
+        {"_id": entry_id},
+        {
+            "$set": {"ai_response": ai_response, "ai_response_status": "done", "updated_at": datetime.utcnow()},
+            "$unset": {"ai_response_error": ""}
+        }
+    )
+    return ai_response
+
+job_queue.register("generate_reply", _generate_reply_job)
+
+async def requeue_stale_replies() -> int:
+    """Queue reply jobs again for entries left unfinished for job_stale_seconds,
+    e.g. jobs the in-memory broker dropped on restart. Returns how many."""
+    db = await get_database()
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.job_stale_seconds)
+    stale = db.journal_entries.find(
+        {"ai_response_status": {"$in": UNFINISHED_REPLY_STATUSES}, "updated_at": {"$lt": cutoff}},
+        {"updated_at": 1}
+    )
+    requeued = 0
+    async for doc in stale:
+        # Claim the entry first so a sweep in another worker skips it
+        claimed = await db.journal_entries.update_one(
+            {"_id": doc["_id"], "updated_at": doc["updated_at"]},
+            {"$set": {"ai_response_status": "pending", "updated_at": datetime.utcnow()}}
+        )
+        if claimed.modified_count:
+            await job_queue.submit("generate_reply", {"entry_id": str(doc["_id"])})
+            requeued += 1
+    if requeued:
+        logger.warning(f"Requeued {requeued} stale AI reply jobs")
+    return requeued
+
+async def sweep_stale_replies():
+    """Run requeue_stale_replies at startup and every job_stale_seconds after"""
+    while True:
+        try:
+            await requeue_stale_replies()
+        except Exception as e:
+            logger.error(f"Error requeueing stale AI reply jobs: {str(e)}")
+        await asyncio.sleep(settings.job_stale_seconds)
+
 @router.post("/entries", response_model=dict)
 async def create_journal_entry(
     entry: JournalEntryCreate,
+    async_reply: Optional[bool] = None,
     current_user: dict = Depends(get_current_user),
+    emotion_analyzer: EmotionAnalyzer = Depends(get_emotion_analyzer),
 ):
-    """Create a new journal entry with emotion analysis"""
+    """Create a new journal entry with emotion analysis.
+
+    With async_reply the AI reply is generated by a background job;
+    ai_response is then null and GET /entries/{id}/reply returns it once ready.
+    If the job cannot be queued the reply is generated inline and returned.
+    """
+    if async_reply is None:
+        async_reply = settings.journal_async_replies
     try:
         db = await get_database()
-        user_id = str(current_user["_id"])
         
         # Analyze emotions
         emotion_analysis = await emotion_analyzer.analyze_text(entry.content)
         
+        if async_reply:
+            entry_data = await _save_entry(db, current_user, entry, emotion_analysis, None, "pending")
+            entry_id = str(entry_data["_id"])
+            ai_response, ai_response_status = None, "pending"
+            try:
+                await job_queue.submit("generate_reply", {"entry_id": entry_id})
+            except Exception as e:
+                # Broker unavailable; generate inline rather than leave it pending
+                logger.error(f"Could not queue AI reply job: {str(e)}")
+                ai_response = await _generate_reply_job({"entry_id": entry_id}, True)
+                ai_response_status = "done"
+            
+            return {
+                "id": entry_id,
+                "emotion_analysis": emotion_analysis,
+                "ai_response": ai_response,
+                "ai_response_status": ai_response_status,
+                "created_at": entry_data["created_at"],
+                "status": "success"
+            }
+        
         # Generate AI response
         ai_response = await response_generator.generate_response(entry.content, emotion_analysis)
         
-        # Create journal entry
-        entry_data = {
-            "user_id": user_id,
-            "title": entry.title,
-            "content": entry.content,
-            "emotion_analysis": emotion_analysis,
-            "detected_emotions": emotion_analysis.get('wheel_emotions', []),
-            "mood_score": emotion_analysis.get('mood_score', 5),
-            "risk_level": emotion_analysis.get('risk_level', 'low'),
-            "is_private": entry.is_private,
-            "word_count": len(entry.content.split()),
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
-        
-        result = await db.journal_entries.insert_one(entry_data)
-        entry_id = str(result.inserted_id)
-        
-        # Update user progress
-        progress = await db.user_progress.find_one({"user_id": user_id})
-        if progress:
-            await db.user_progress.update_one(
-                {"user_id": user_id},
-                {
-                    "$inc": {
-                        "journal_entries_count": 1,
-                        "total_xp": 5
-                    },
-                    "$set": {"updated_at": datetime.utcnow()}
-                }
-            )
+        entry_data = await _save_entry(db, current_user, entry, emotion_analysis, ai_response)
         
         return {
-            "id": entry_id,
+            "id": str(entry_data["_id"]),
             "emotion_analysis": emotion_analysis,
             "ai_response": ai_response,
             "created_at": entry_data["created_at"],
             "status": "success"
         }
         
+    except QueueFullError:
+        raise
     except Exception as e:
         logger.error(f"Error creating journal entry: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create journal entry")
 
+@router.get("/entries/{entry_id}/reply")
+async def get_entry_reply(
+    entry_id: str,
+    wait: float = 0,
+    current_user: dict = Depends(get_current_user),
+):
+    """AI reply status for an entry. wait > 0 long-polls until the reply is ready."""
+    db = await get_database()
+    try:
+        query = {"_id": ObjectId(entry_id), "user_id": str(current_user["_id"])}
+    except Exception:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    projection = {"ai_response": 1, "ai_response_status": 1, "ai_response_error": 1}
+    
+    deadline = time.monotonic() + max(0.0, min(wait, settings.job_poll_max_wait_seconds))
+    while True:
+        doc = await db.journal_entries.find_one(query, projection, max_time_ms=settings.mongo_max_time_ms)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Entry not found")
+        # Entries saved with an inline reply have no status field
+        status = doc.get("ai_response_status") or ("done" if doc.get("ai_response") else "pending")
+        if status == "done" or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(REPLY_POLL_INTERVAL_SECONDS)
+    
+    return {
+        "id": entry_id,
+        "ai_response_status": status,
+        "ai_response": doc.get("ai_response"),
+        "error": doc.get("ai_response_error")
+    }
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/entries/stream")
+async def create_journal_entry_streaming(
+    entry: JournalEntryCreate,
+    current_user: dict = Depends(get_current_user),
+    emotion_analyzer: EmotionAnalyzer = Depends(get_emotion_analyzer),
+):
+    """Create a journal entry and stream the AI reply as server-sent events.
+
+    Events: "entry" (id, emotion_analysis, created_at) as soon as the entry
+    is saved, then "token" ({"text": ...}) per reply fragment, then "done"
+    with the full ai_response. The reply is stored on the entry even if the
+    client disconnects first.
+    """
+    started_at = time.perf_counter()
+    try:
+        db = await get_database()
+        emotion_analysis = await emotion_analyzer.analyze_text(entry.content)
+        # "running" until the reply is saved, so the stale-reply sweep
+        # recovers entries whose worker died mid-stream
+        entry_data = await _save_entry(db, current_user, entry, emotion_analysis, None, "running")
+    except QueueFullError:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating journal entry: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to create journal entry")
+    
+    entry_id = entry_data["_id"]
+    # The reply is generated and saved by its own task, so a client that
+    # disconnects mid-stream still gets it when reading the entry later
+    fragments: asyncio.Queue = asyncio.Queue()
+    reply = asyncio.get_running_loop().create_task(
+        _stream_reply(db, entry_id, entry.content, emotion_analysis, started_at, fragments)
+    )
+    _reply_streams.add(reply)
+    reply.add_done_callback(_reply_streams.discard)
+    
+    async def events():
+        yield _sse("entry", {
+            "id": str(entry_id),
+            "emotion_analysis": emotion_analysis,
+            "created_at": entry_data["created_at"],
+        })
+        reply_stream_ttfb_ms.observe((time.perf_counter() - started_at) * 1000)
+        
+        while (text := await fragments.get()) is not None:
+            yield _sse("token", {"text": text})
+        
+        yield _sse("done", {"id": str(entry_id), "ai_response": await reply})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _stream_reply(
+    db,
+    entry_id: ObjectId,
+    content: str,
+    emotion_analysis: dict,
+    started_at: float,
+    fragments: asyncio.Queue,
+) -> dict:
+    """Generate a streamed entry's reply, passing fragments to the SSE
+    response (None marks the end), and store it on the entry"""
+    parts = []
+    ai_response = None
+    try:
+        if emotion_analysis.get('risk_level') == 'high':
+            # Crisis replies are fixed text; send them whole
+            ai_response = await response_generator.generate_response(content, emotion_analysis)
+            fragments.put_nowait(ai_response["response"])
+        else:
+            async for text in response_generator.stream_supportive_response(content, emotion_analysis):
+                if not parts:
+                    reply_stream_ttft_ms.observe((time.perf_counter() - started_at) * 1000)
+                parts.append(text)
+                fragments.put_nowait(text)
+            ai_response = response_generator.supportive_reply("".join(parts).strip(), emotion_analysis)
+    finally:
+        if ai_response is None:
+            # Cancelled (e.g. at shutdown) or failed part way
+            ai_response = response_generator.interrupted_reply("".join(parts).strip(), emotion_analysis)
+        try:
+            # Shielded so a second cancellation cannot drop the write
+            await asyncio.shield(db.journal_entries.update_one(
+                {"_id": entry_id},
+                {"$set": {"ai_response": ai_response, "ai_response_status": "done", "updated_at": datetime.utcnow()}}
+            ))
+        except Exception as e:
+            logger.error(f"Error saving streamed AI response: {str(e)}")
+        fragments.put_nowait(None)
+    return ai_response
+
+async def close_reply_streams():
+    """Cut off streamed replies still running; each saves what it has"""
+    for task in list(_reply_streams):
+        task.cancel()
+    await asyncio.gather(*_reply_streams, return_exceptions=True)
+
+def stream_stats() -> dict:
+    """Latency histograms for the streaming reply endpoint"""
+    return {
+        "ttfb_ms": reply_stream_ttfb_ms.snapshot(),
+        "ttft_ms": reply_stream_ttft_ms.snapshot(),
+    }
+
 @router.post("/analyze-voice")
 async def analyze_voice_entry(
     audio: UploadFile = File(...),
     current_user: dict = Depends(get_current_user),
+    emotion_analyzer: EmotionAnalyzer = Depends(get_emotion_analyzer),
 ):
     """Analyze voice journal entry using Azure Speech Service"""
     try:
@@ -121,32 +422,77 @@ async def analyze_voice_entry(
             "status": "success"
         }
         
+    except QueueFullError:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing voice: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to analyze voice: {str(e)}")
 
+def _encode_cursor(entry: dict) -> str:
+    """Opaque cursor pointing just past an entry in (created_at, _id) order"""
+    raw = f"{entry['created_at'].isoformat()}|{entry['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), ObjectId(entry_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def _count_entries(db, user_id: str) -> int:
+    """Entry count for a user, cached briefly since it is only informational"""
+    total = entry_count_cache.get(user_id)
+    if total is None:
+        total = await db.journal_entries.count_documents(
+            {"user_id": user_id}, maxTimeMS=settings.mongo_list_max_time_ms
+        )
+        entry_count_cache.set(user_id, total)
+    return total
+
 @router.get("/entries")
 async def get_journal_entries(
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 10,
+    include_total: bool = False,
+    skip: int = 0,
     current_user: dict = Depends(get_current_user),
 ):
-    """Get user's journal entries"""
+    """Get user's journal entries, newest first.
+
+    Pass the returned next_cursor to fetch the following page. skip is
+    kept for older clients but gets slower on deep pages.
+    """
     db = await get_database()
     user_id = str(current_user["_id"])
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
     
-    entries = await db.journal_entries.find(
-        {"user_id": user_id}
-    ).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    query = {"user_id": user_id}
+    if cursor:
+        created_at, entry_id = _decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": entry_id}}
+        ]
     
-    total = await db.journal_entries.count_documents({"user_id": user_id})
+    find = (
+        db.journal_entries.find(query, LIST_PROJECTION)
+        .sort([("created_at", -1), ("_id", -1)])
+        .max_time_ms(settings.mongo_list_max_time_ms)
+    )
+    if skip and not cursor:
+        find = find.skip(skip)
+    # One extra document tells us whether another page exists
+    entries = await find.limit(limit + 1).to_list(length=limit + 1)
+    has_more = len(entries) > limit
+    entries = entries[:limit]
     
     return {
         "entries": [
             {
                 "id": str(entry["_id"]),
                 "title": entry.get("title"),
-                "content": entry["content"][:200] + "..." if len(entry["content"]) > 200 else entry["content"],
+                "content": entry.get("preview", ""),
                 "created_at": entry.get("created_at", datetime.utcnow()),
                 "mood_score": entry.get("mood_score"),
                 "risk_level": entry.get("risk_level", "low"),
@@ -154,5 +500,7 @@ async def get_journal_entries(
             }
             for entry in entries
         ],
-        "total": total
+        "next_cursor": _encode_cursor(entries[-1]) if has_more and entries else None,
+        "has_more": has_more,
+        "total": await _count_entries(db, user_id) if include_total else None
     }
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date, datetime, timedelta
+from typing import Optional
 from app.database import get_database
+from app.core.config import settings
 from app.models.schemas import UserProgressResponse
 from app.core.security import get_current_user
+from app.services.progress_buffer import progress_buffer
+from app.services.progress_service import apply_progress
+from app.services.rollups import get_rollups, risk_label
+from app.utils.helpers import user_timezone
 import calendar
 
+MAX_ACTIVITY_DAYS = 366
+
 router = APIRouter()
 
 @router.get("/", response_model=UserProgressResponse)
@@ -15,7 +23,7 @@ async def get_progress(
     db = await get_database()
     user_id = str(current_user["_id"])
     
-    progress = await db.user_progress.find_one({"user_id": user_id})
+    progress = await db.user_progress.find_one({"user_id": user_id}, max_time_ms=settings.mongo_max_time_ms)
     
     if not progress:
         # Create default progress if none exists
@@ -34,6 +42,9 @@ async def get_progress(
         await db.user_progress.insert_one(progress_data)
         progress = progress_data
     
+    # Include increments still waiting in the write-behind buffer
+    progress = progress_buffer.merge(progress, user_id)
+    
     return UserProgressResponse(
         current_level=progress.get("current_level", 1),
         total_xp=progress.get("total_xp", 0),
@@ -51,6 +62,62 @@ async def get_progress_stats(
     """Get user's progress statistics (alternative endpoint)"""
     return await get_progress(current_user)
 
+def _activity_range(range_name: str, today: date):
+    """First and last day of the current week, month or year"""
+    if range_name == "week":
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if range_name == "month":
+        return today.replace(day=1), today.replace(day=calendar.monthrange(today.year, today.month)[1])
+    if range_name == "year":
+        return date(today.year, 1, 1), date(today.year, 12, 31)
+    raise HTTPException(status_code=400, detail="range must be week, month or year")
+
+@router.get("/activity")
+async def get_activity_heatmap(
+    range_name: str = Query("week", alias="range"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """Get journal activity per day for a week, month, year or custom range"""
+    db = await get_database()
+    user_id = str(current_user["_id"])
+    tz = user_timezone(current_user)
+    
+    if start and end:
+        if end < start or (end - start).days >= MAX_ACTIVITY_DAYS:
+            raise HTTPException(status_code=400, detail=f"Range must span 1 to {MAX_ACTIVITY_DAYS} days")
+    else:
+        start, end = _activity_range(range_name, datetime.now(tz).date())
+    
+    rollups = await get_rollups(db, user_id, start.isoformat(), end.isoformat())
+    
+    days = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        day_str = day.strftime("%Y-%m-%d")
+        rollup = rollups.get(day_str)
+        count = rollup["entry_count"] if rollup else 0
+        days.append({
+            "date": day_str,
+            "day": calendar.day_name[day.weekday()][:3],
+            "count": count,
+            "word_count": rollup.get("word_count", 0) if rollup else 0,
+            "avg_mood": round(rollup["mood_sum"] / count, 1) if count else None,
+            "max_risk_level": risk_label(rollup.get("max_risk_rank", 0)) if rollup else None,
+            "wheel_emotions": rollup.get("wheel_emotions", {}) if rollup else {}
+        })
+    
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "timezone": tz.key,
+        "days": days,
+        "active_days": sum(1 for d in days if d["count"] > 0),
+        "total_entries": sum(d["count"] for d in days)
+    }
+
 @router.get("/weekly-activity")
 async def get_weekly_activity(
     current_user: dict = Depends(get_current_user),
@@ -58,28 +125,20 @@ async def get_weekly_activity(
     """Get weekly activity data"""
     db = await get_database()
     user_id = str(current_user["_id"])
+    tz = user_timezone(current_user)
     
-    today = datetime.now()
-    week_start = today - timedelta(days=today.weekday())
+    week_start, week_end = _activity_range("week", datetime.now(tz).date())
+    rollups = await get_rollups(db, user_id, week_start.isoformat(), week_end.isoformat())
     
     weekly_data = []
     for i in range(7):
         day = week_start + timedelta(days=i)
         day_str = day.strftime("%Y-%m-%d")
         
-        # Check if there are journal entries for this day
-        count = await db.journal_entries.count_documents({
-            "user_id": user_id,
-            "created_at": {
-                "$gte": datetime.combine(day.date(), datetime.min.time()),
-                "$lt": datetime.combine(day.date(), datetime.max.time())
-            }
-        })
-        
         weekly_data.append({
             "date": day_str,
             "day": calendar.day_name[day.weekday()][:3],
-            "active": count > 0
+            "active": day_str in rollups
         })
     
     return {
@@ -96,29 +155,9 @@ async def update_streak(
     db = await get_database()
     user_id = str(current_user["_id"])
     
-    progress = await db.user_progress.find_one({"user_id": user_id})
-    
-    if progress:
-        today = datetime.now().date()
-        last_activity = progress.get("last_activity_date")
-        
-        if not last_activity or last_activity.date() != today:
-            new_streak = progress.get("current_streak", 0) + 1
-            longest_streak = max(progress.get("longest_streak", 0), new_streak)
-            
-            await db.user_progress.update_one(
-                {"user_id": user_id},
-                {
-                    "$set": {
-                        "current_streak": new_streak,
-                        "longest_streak": longest_streak,
-                        "last_activity_date": datetime.utcnow(),
-                        "updated_at": datetime.utcnow()
-                    },
-                    "$inc": {"total_xp": 10}
-                }
-            )
-            progress["current_streak"] = new_streak
+    progress = await apply_progress(
+        db, user_id, record_activity=True, streak_xp=10, tz=user_timezone(current_user)
+    )
     
     return {"message": "Streak updated", "current_streak": progress.get("current_streak", 0) if progress else 0}
 
@@ -130,7 +169,9 @@ async def get_achievements(
     db = await get_database()
     user_id = str(current_user["_id"])
     
-    progress = await db.user_progress.find_one({"user_id": user_id})
+    progress = progress_buffer.merge(await db.user_progress.find_one(
+        {"user_id": user_id}, max_time_ms=settings.mongo_max_time_ms
+    ), user_id)
     
     all_achievements = [
         {
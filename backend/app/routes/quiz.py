@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
-from datetime import datetime
 from app.database import get_database
 from app.models.schemas import QuizQuestion, QuizAnswer, QuizResult
 from app.core.security import get_current_user
+from app.services.progress_buffer import progress_buffer
 from bson import ObjectId
 import uuid
 import random
@@ -116,19 +116,7 @@ async def submit_quiz(
     xp_earned = correct_count * 5  # 5 XP per correct answer
     
     # Update user progress
-    progress = await db.user_progress.find_one({"user_id": user_id})
-    
-    if progress:
-        await db.user_progress.update_one(
-            {"user_id": user_id},
-            {
-                "$inc": {
-                    "total_xp": xp_earned,
-                    "words_learned": correct_count
-                },
-                "$set": {"updated_at": datetime.utcnow()}
-            }
-        )
+    await progress_buffer.record(db, user_id, xp=xp_earned, words_learned=correct_count)
     
     return {
         "score": score,
@@ -0,0 +1,119 @@
+"""
+Two-tier cache for EmotionAnalyzer results: an in-process LRU in front of
+an optional Redis tier shared by every worker.
+"""
+from typing import Dict, Any, Optional
+import copy
+import json
+import re
+import logging
+from app.core.config import settings
+from app.utils.cache import LRUCache
+from app.utils.helpers import hash_content
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "analysis"
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different submissions share a key"""
+    return re.sub(r'\s+', ' ', text).strip()
+
+class AnalysisCache:
+    """Cache analysis results by normalized-text hash and model version"""
+
+    def __init__(
+        self,
+        model_version: str,
+        max_size: int = 1024,
+        ttl_seconds: int = 3600,
+        redis_client=None,
+    ):
+        self.model_version = model_version
+        self.ttl_seconds = ttl_seconds
+        self.local = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.redis = redis_client
+
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+
+    @classmethod
+    def from_settings(cls, model_version: str) -> "AnalysisCache":
+        """Build the cache from settings, enabling Redis when configured"""
+        redis_client = None
+        if settings.analysis_cache_redis_enabled:
+            try:
+                import redis.asyncio as redis
+                redis_client = redis.from_url(settings.redis_url)
+            except ImportError:
+                logger.warning("redis package not installed; using in-process cache only")
+        return cls(
+            model_version,
+            max_size=settings.analysis_cache_size,
+            ttl_seconds=settings.analysis_cache_ttl_seconds,
+            redis_client=redis_client,
+        )
+
+    def key_for(self, text: str) -> str:
+        return f"{KEY_PREFIX}:{self.model_version}:{hash_content(normalize_text(text))}"
+
+    async def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """Look up a result, checking the local tier before Redis"""
+        key = self.key_for(text)
+        value = self.local.get(key)
+        if value is not None:
+            return copy.deepcopy(value)
+
+        if self.redis is None:
+            return None
+
+        try:
+            raw = await self.redis.get(key)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Analysis cache Redis get failed: {str(e)}")
+            return None
+
+        if raw is None:
+            self.redis_misses += 1
+            return None
+
+        self.redis_hits += 1
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return copy.deepcopy(value)
+
+    async def set(self, text: str, analysis: Dict[str, Any]):
+        """Store a result in both tiers"""
+        key = self.key_for(text)
+        self.local.set(key, copy.deepcopy(analysis))
+
+        if self.redis is None:
+            return
+
+        try:
+            await self.redis.set(key, json.dumps(analysis, default=str), ex=self.ttl_seconds)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Analysis cache Redis set failed: {str(e)}")
+
+    async def close(self):
+        if self.redis is not None:
+            try:
+                await self.redis.close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for both tiers"""
+        return {
+            "model_version": self.model_version,
+            "local": self.local.stats(),
+            "redis": {
+                "enabled": self.redis is not None,
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+                "errors": self.redis_errors,
+            },
+        }
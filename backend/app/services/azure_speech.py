@@ -2,14 +2,99 @@
 Azure AI Services integration for Speech and Translation
 Based on: https://learn.microsoft.com/en-us/azure/ai-services/what-are-ai-services
 """
-import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from app.core.config import settings
+from app.services.http_clients import http_clients
+import asyncio
+import time
 import logging
 import base64
 
 logger = logging.getLogger(__name__)
 
+class AzureSpeechTokenProvider:
+    """Cache Speech access tokens per region and refresh them before expiry.
+
+    Azure tokens are valid for 10 minutes. A token older than
+    refresh_after_seconds is still returned while a background refresh
+    runs; concurrent callers share a single in-flight issueToken request.
+    """
+
+    def __init__(self, ttl_seconds: float = 540.0, refresh_after_seconds: float = 480.0):
+        self.ttl_seconds = ttl_seconds
+        self.refresh_after_seconds = min(refresh_after_seconds, ttl_seconds)
+        # (region, key) -> (token, issued_at)
+        self._tokens: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._refreshes: Dict[Tuple[str, str], asyncio.Task] = {}
+
+        self.hits = 0
+        self.issued = 0
+        self.failures = 0
+
+    async def get_token(self, region: str, key: str) -> Optional[str]:
+        """Current token for a region, or None if one cannot be issued"""
+        cache_key = (region, key)
+        cached = self._tokens.get(cache_key)
+        if cached is not None:
+            token, issued_at = cached
+            age = time.monotonic() - issued_at
+            if age < self.ttl_seconds:
+                if age >= self.refresh_after_seconds:
+                    self._refresh(cache_key)
+                self.hits += 1
+                return token
+
+        try:
+            # Shield so one caller's cancellation does not abort the shared refresh
+            return await asyncio.shield(self._refresh(cache_key))
+        except Exception as e:
+            logger.error(f"Failed to get Azure Speech token: {str(e)}")
+            return None
+
+    def invalidate(self, region: str, key: str):
+        """Drop a token the service rejected"""
+        self._tokens.pop((region, key), None)
+
+    def _refresh(self, cache_key: Tuple[str, str]) -> asyncio.Task:
+        """Start an issueToken request unless one is already running"""
+        task = self._refreshes.get(cache_key)
+        if task is None or task.done():
+            task = asyncio.get_running_loop().create_task(self._issue(*cache_key))
+            task.add_done_callback(self._refresh_done)
+            self._refreshes[cache_key] = task
+        return task
+
+    def _refresh_done(self, task: asyncio.Task):
+        # Background refreshes have no awaiting caller; log their failures here
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+            logger.warning(f"Azure Speech token refresh failed: {str(task.exception())}")
+
+    async def _issue(self, region: str, key: str) -> str:
+        response = await http_clients.get("azure_speech").post(
+            f"https://{region}.api.cognitive.microsoft.com/sts/v1.0/issueToken",
+            headers={
+                "Ocp-Apim-Subscription-Key": key
+            }
+        )
+        response.raise_for_status()
+        self._tokens[(region, key)] = (response.text, time.monotonic())
+        self.issued += 1
+        return response.text
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "regions": sorted({region for region, _ in self._tokens}),
+            "hits": self.hits,
+            "issued": self.issued,
+            "failures": self.failures,
+        }
+
+speech_token_provider = AzureSpeechTokenProvider(
+    ttl_seconds=settings.azure_speech_token_ttl_seconds,
+    refresh_after_seconds=settings.azure_speech_token_refresh_seconds
+)
+
 class AzureSpeechService:
     """Azure Speech Service for text-to-speech and speech-to-text"""
     
@@ -25,44 +110,38 @@ class AzureSpeechService:
             return None
             
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Get access token
-                token_response = await client.post(
-                    f"https://{self.speech_region}.api.cognitive.microsoft.com/sts/v1.0/issueToken",
-                    headers={
-                        "Ocp-Apim-Subscription-Key": self.speech_key
-                    }
-                )
-                
-                if token_response.status_code != 200:
-                    logger.error(f"Failed to get Azure Speech token: {token_response.status_code}")
-                    return None
-                
-                access_token = token_response.text
-                
-                # Generate speech
-                ssml = f"""<speak version='1.0' xml:lang='en-US'>
-                    <voice xml:lang='en-US' name='{voice}'>
-                        {text}
-                    </voice>
-                </speak>"""
-                
-                speech_response = await client.post(
-                    f"{self.base_url}/cognitiveservices/v1",
-                    headers={
-                        "Authorization": f"Bearer {access_token}",
-                        "Content-Type": "application/ssml+xml",
-                        "X-Microsoft-OutputFormat": "audio-16khz-128kbitrate-mono-mp3"
-                    },
-                    content=ssml
-                )
+            client = http_clients.get("azure_speech")
+            # Get access token (cached per region)
+            access_token = await speech_token_provider.get_token(self.speech_region, self.speech_key)
+            if access_token is None:
+                return None
+            
+            # Generate speech
+            ssml = f"""<speak version='1.0' xml:lang='en-US'>
+                <voice xml:lang='en-US' name='{voice}'>
+                    {text}
+                </voice>
+            </speak>"""
+            
+            speech_response = await client.post(
+                f"{self.base_url}/cognitiveservices/v1",
+                headers={
+                    "Authorization": f"Bearer {access_token}",
+                    "Content-Type": "application/ssml+xml",
+                    "X-Microsoft-OutputFormat": "audio-16khz-128kbitrate-mono-mp3"
+                },
+                content=ssml
+            )
+            
+            if speech_response.status_code == 200:
+                return speech_response.content
+            else:
+                if speech_response.status_code == 401:
+                    # Token revoked or expired early; fetch a new one next time
+                    speech_token_provider.invalidate(self.speech_region, self.speech_key)
+                logger.error(f"Failed to generate speech: {speech_response.status_code}")
+                return None
                 
-                if speech_response.status_code == 200:
-                    return speech_response.content
-                else:
-                    logger.error(f"Failed to generate speech: {speech_response.status_code}")
-                    return None
-                    
         except Exception as e:
             logger.error(f"Azure Speech error: {str(e)}")
             return None
@@ -74,38 +153,32 @@ class AzureSpeechService:
             return None
             
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Get access token
-                token_response = await client.post(
-                    f"https://{self.speech_region}.api.cognitive.microsoft.com/sts/v1.0/issueToken",
-                    headers={
-                        "Ocp-Apim-Subscription-Key": self.speech_key
-                    }
-                )
-                
-                if token_response.status_code != 200:
-                    logger.error(f"Failed to get Azure Speech token: {token_response.status_code}")
-                    return None
-                
-                access_token = token_response.text
-                
-                # Convert speech to text
-                speech_response = await client.post(
-                    f"https://{self.speech_region}.stt.speech.microsoft.com/speech/recognition/conversation/cognitiveservices/v1?language={language}",
-                    headers={
-                        "Authorization": f"Bearer {access_token}",
-                        "Content-Type": "audio/wav"
-                    },
-                    content=audio_data
-                )
+            client = http_clients.get("azure_speech")
+            # Get access token (cached per region)
+            access_token = await speech_token_provider.get_token(self.speech_region, self.speech_key)
+            if access_token is None:
+                return None
+            
+            # Convert speech to text
+            speech_response = await client.post(
+                f"https://{self.speech_region}.stt.speech.microsoft.com/speech/recognition/conversation/cognitiveservices/v1?language={language}",
+                headers={
+                    "Authorization": f"Bearer {access_token}",
+                    "Content-Type": "audio/wav"
+                },
+                content=audio_data
+            )
+            
+            if speech_response.status_code == 200:
+                result = speech_response.json()
+                return result.get("DisplayText", "")
+            else:
+                if speech_response.status_code == 401:
+                    # Token revoked or expired early; fetch a new one next time
+                    speech_token_provider.invalidate(self.speech_region, self.speech_key)
+                logger.error(f"Failed to transcribe speech: {speech_response.status_code}")
+                return None
                 
-                if speech_response.status_code == 200:
-                    result = speech_response.json()
-                    return result.get("DisplayText", "")
-                else:
-                    logger.error(f"Failed to transcribe speech: {speech_response.status_code}")
-                    return None
-                    
         except Exception as e:
             logger.error(f"Azure Speech error: {str(e)}")
             return None
@@ -126,29 +199,29 @@ class AzureTranslatorService:
             return None
             
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/translate",
-                    headers={
-                        "Ocp-Apim-Subscription-Key": self.translator_key,
-                        "Ocp-Apim-Subscription-Region": self.translator_region,
-                        "Content-Type": "application/json"
-                    },
-                    params={
-                        "api-version": "3.0",
-                        "from": source_language,
-                        "to": target_language
-                    },
-                    json=[{"text": text}]
-                )
+            client = http_clients.get("azure_translator")
+            response = await client.post(
+                f"{self.base_url}/translate",
+                headers={
+                    "Ocp-Apim-Subscription-Key": self.translator_key,
+                    "Ocp-Apim-Subscription-Region": self.translator_region,
+                    "Content-Type": "application/json"
+                },
+                params={
+                    "api-version": "3.0",
+                    "from": source_language,
+                    "to": target_language
+                },
+                json=[{"text": text}]
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                return result[0]["translations"][0]["text"]
+            else:
+                logger.error(f"Failed to translate text: {response.status_code}")
+                return None
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    return result[0]["translations"][0]["text"]
-                else:
-                    logger.error(f"Failed to translate text: {response.status_code}")
-                    return None
-                    
         except Exception as e:
             logger.error(f"Azure Translator error: {str(e)}")
             return None
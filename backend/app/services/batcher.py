@@ -0,0 +1,162 @@
+"""
+Asyncio micro-batcher: collects concurrent requests for a short window and
+runs them through the models as a single batch.
+"""
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional, Tuple
+import time
+import logging
+from app.utils.metrics import Histogram
+from app.utils.worker_pool import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64]
+QUEUE_WAIT_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 250]
+
+class MicroBatcher:
+    """Coalesce concurrent submissions into batches for process_batch"""
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        executor: Optional[Executor] = None,
+        max_concurrent_batches: int = 1,
+        max_queue_depth: int = 0,
+        retry_after: int = 1,
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        # Batches run here so inference never blocks the event loop
+        self.executor = executor
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        # 0 means unbounded
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.retry_after = retry_after
+
+        self.pending = 0
+        self.rejected = 0
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result"""
+        self._ensure_worker()
+        if self.max_queue_depth and self.pending >= self.max_queue_depth:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after)
+
+        self.pending += 1
+        try:
+            future = self._loop.create_future()
+            self._queue.put_nowait((item, future, time.perf_counter()))
+            return await future
+        finally:
+            self.pending -= 1
+
+    async def run_batch(self, items: List[Any]) -> List[Any]:
+        """Run a caller-assembled batch as one unit, within the same queue bounds"""
+        self._ensure_worker()
+        if self.max_queue_depth and self.pending + len(items) > self.max_queue_depth:
+            self.rejected += len(items)
+            raise QueueFullError(self.retry_after)
+
+        self.pending += len(items)
+        try:
+            queued_at = time.perf_counter()
+            async with self._slots:
+                self.queue_wait_ms.observe((time.perf_counter() - queued_at) * 1000)
+                self.batch_sizes.observe(len(items))
+                return await self._loop.run_in_executor(self.executor, self.process_batch, items)
+        finally:
+            self.pending -= len(items)
+
+    def _ensure_worker(self):
+        """Start the collector task on the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Keep collecting while earlier batches are still running
+            await self._slots.acquire()
+            task = self._loop.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        """Run one batch and hand each result back to its caller"""
+        try:
+            await self._run_batch(batch)
+        finally:
+            self._slots.release()
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        now = time.perf_counter()
+        for _, _, queued_at in batch:
+            self.queue_wait_ms.observe((now - queued_at) * 1000)
+        self.batch_sizes.observe(len(batch))
+
+        try:
+            results = await self._loop.run_in_executor(
+                self.executor, self.process_batch, [item for item, _, _ in batch]
+            )
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} failed: {str(e)}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        """Stop the collector task"""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def stats(self):
+        """Batch-size and queue-wait histograms"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_queue_depth": self.max_queue_depth,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
@@ -0,0 +1,188 @@
+"""
+Aho-Corasick matcher for crisis phrases. Finds every phrase in a single pass
+over the text. A match must start at a word boundary but may run on into
+word characters, so inflections ("self harming", "overdosed") still match.
+"""
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+import os
+import threading
+import time
+import logging
+from app.utils.helpers import hash_content
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CRISIS_KEYWORDS = [
+    'suicide', 'kill myself', 'end my life', 'not worth living',
+    'everyone would be better without me', 'want to die',
+    'cutting myself', 'self harm', 'overdose', 'end it all',
+    'no point in living', 'better off dead'
+]
+
+# Below this many phrases one str.find per phrase (C speed) beats the
+# pure-Python automaton walk; see benchmarks/crisis_matcher.py
+DIRECT_SCAN_MAX_PHRASES = 200
+
+# Whitespace that _normalize collapses, for plain-ASCII text
+_ASCII_WHITESPACE_RUNS = ("  ", "\n", "\t", "\r", "\x0b", "\x0c")
+
+def _normalize(text: str) -> str:
+    text = text.lower()
+    # Most entries need no rewriting, and checking is far cheaper than splitting
+    if text.isascii() and not any(run in text for run in _ASCII_WHITESPACE_RUNS):
+        return text
+    return " ".join(text.split())
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+class _Automaton:
+    """Immutable transition/output tables for one phrase list"""
+
+    def __init__(self, phrases: List[str]):
+        self.phrases = phrases
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Indexes into phrases ending at each state
+        self.output: List[List[int]] = [[]]
+
+        for index, phrase in enumerate(phrases):
+            state = 0
+            for char in phrase:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(index)
+
+        # Breadth-first pass to build failure links, then fold them into a
+        # full transition table so the scan is one dict lookup per character
+        self.delta: List[Dict[str, int]] = [dict(self.goto[0])]
+        self.delta.extend({} for _ in range(len(self.goto) - 1))
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self.delta[state] = {**self.delta[self.fail[state]], **self.goto[state]}
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                self.fail[next_state] = self.delta[self.fail[state]].get(char, 0) if state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def search(self, text: str) -> List[int]:
+        """Indexes of phrases found starting on a word boundary, in phrase-list order"""
+        if len(self.phrases) <= DIRECT_SCAN_MAX_PHRASES:
+            return self._scan(text)
+
+        delta, output, phrases = self.delta, self.output, self.phrases
+        found = set()
+        state = 0
+
+        for position, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            if not output[state]:
+                continue
+
+            for index in output[state]:
+                start = position - len(phrases[index]) + 1
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    found.add(index)
+
+        return sorted(found)
+
+    def _scan(self, text: str) -> List[int]:
+        """Same result as search, using str.find per phrase"""
+        found = []
+        for index, phrase in enumerate(self.phrases):
+            start = text.find(phrase)
+            while start != -1:
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    found.append(index)
+                    break
+                start = text.find(phrase, start + 1)
+        return found
+
+class CrisisMatcher:
+    """Thread-safe crisis phrase matcher with hot reloading"""
+
+    def __init__(
+        self,
+        phrases: Optional[Iterable[str]] = None,
+        source_path: Optional[str] = None,
+        reload_interval_seconds: float = 30.0,
+    ):
+        self.source_path = source_path
+        self.reload_interval_seconds = reload_interval_seconds
+        self._source_mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[["CrisisMatcher"], None]] = []
+
+        if source_path and os.path.exists(source_path):
+            self._load_file()
+        else:
+            self.reload(phrases if phrases is not None else DEFAULT_CRISIS_KEYWORDS)
+
+    @property
+    def phrases(self) -> List[str]:
+        return list(self._automaton.phrases)
+
+    @property
+    def version(self) -> str:
+        """Fingerprint of the current phrase list"""
+        return self._version
+
+    def reload(self, phrases: Iterable[str]):
+        """Swap in a new phrase list; matching never sees a half-built table"""
+        cleaned = []
+        for phrase in phrases:
+            phrase = _normalize(phrase).strip()
+            if phrase and phrase not in cleaned:
+                cleaned.append(phrase)
+
+        automaton = _Automaton(cleaned)
+        self._automaton = automaton
+        self._version = hash_content("\n".join(cleaned))[:8]
+        logger.info(f"Loaded {len(cleaned)} crisis phrases (version {self._version})")
+
+        for listener in self._listeners:
+            listener(self)
+
+    def on_reload(self, listener: Callable[["CrisisMatcher"], None]):
+        """Register a callback run after every reload"""
+        self._listeners.append(listener)
+
+    def _load_file(self):
+        with open(self.source_path, encoding="utf-8") as f:
+            phrases = [line for line in f.read().splitlines() if not line.lstrip().startswith("#")]
+        self._source_mtime = os.path.getmtime(self.source_path)
+        self.reload(phrases)
+
+    def reload_if_changed(self):
+        """Reload from source_path when the file has changed since the last check"""
+        if not self.source_path:
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.reload_interval_seconds
+            try:
+                mtime = os.path.getmtime(self.source_path)
+                if mtime != self._source_mtime:
+                    self._load_file()
+            except OSError as e:
+                logger.error(f"Could not reload crisis phrases: {str(e)}")
+
+    def find(self, text: str) -> List[str]:
+        """Crisis phrases present in text"""
+        self.reload_if_changed()
+        automaton = self._automaton
+        return [automaton.phrases[index] for index in automaton.search(_normalize(text))]
@@ -1,38 +1,42 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-import librosa
-import numpy as np
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 import logging
 import re
+from app.core.config import settings
+from app.services.analysis_cache import AnalysisCache
+from app.services.batcher import MicroBatcher, QueueFullError
+from app.services.crisis_matcher import CrisisMatcher
 
 logger = logging.getLogger(__name__)
 
+# Bump when post-processing changes so cached results are not reused
+ANALYSIS_VERSION = 2
+
+# Ordered from least to most severe
+RISK_LEVELS = ["low", "low-medium", "medium", "high"]
+
 class EmotionAnalyzer:
-    def __init__(self):
+    def __init__(self, registry=None):
+        import torch
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         logger.info(f"Using device: {self.device}")
         
-        # Initialize models
-        self.sentiment_analyzer = pipeline(
-            "sentiment-analysis",
-            model="cardiffnlp/twitter-roberta-base-sentiment-latest",
-            device=0 if torch.cuda.is_available() else -1
-        )
+        # Models are shared across the process through the registry
+        if registry is None:
+            from app.services.model_registry import model_registry as registry
+        self.sentiment_analyzer = registry.get_pipeline("sentiment")
+        self.emotion_analyzer = registry.get_pipeline("emotion")
         
-        self.emotion_analyzer = pipeline(
-            "text-classification",
-            model="j-hartmann/emotion-english-distilroberta-base",
-            device=0 if torch.cuda.is_available() else -1
+        # Crisis detection phrases, matched in a single pass
+        self.crisis_matcher = CrisisMatcher(
+            source_path=settings.crisis_keywords_file,
+            reload_interval_seconds=settings.crisis_keywords_reload_seconds
         )
         
-        # Crisis detection keywords
-        self.crisis_keywords = [
-            'suicide', 'kill myself', 'end my life', 'not worth living',
-            'everyone would be better without me', 'want to die',
-            'cutting myself', 'self harm', 'overdose', 'end it all',
-            'no point in living', 'better off dead'
-        ]
+        # Results depend on the phrase list, so it is part of the cache key
+        self._model_version = registry.model_version
+        self.cache = AnalysisCache.from_settings(self._cache_version())
+        self.crisis_matcher.on_reload(self._on_crisis_reload)
         
         # Emotion mapping to wheel categories
         self.emotion_wheel_mapping = {
@@ -45,38 +49,48 @@ class EmotionAnalyzer:
             'love': 'happy',
             'optimism': 'happy'
         }
+        
+        # Inference runs on a dedicated pool so the event loop stays responsive
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.inference_workers,
+            thread_name_prefix="inference"
+        )
+        self.batcher = MicroBatcher(
+            self.analyze_batch,
+            max_batch_size=settings.inference_batch_max_size,
+            max_wait_ms=settings.inference_batch_max_wait_ms,
+            executor=self.executor,
+            max_concurrent_batches=settings.inference_workers,
+            max_queue_depth=settings.inference_queue_depth,
+            retry_after=settings.inference_retry_after_seconds
+        )
+
+    @property
+    def crisis_keywords(self) -> List[str]:
+        return self.crisis_matcher.phrases
+
+    def _cache_version(self) -> str:
+        return f"{self._model_version}-v{ANALYSIS_VERSION}-k{self.crisis_matcher.version}"
+
+    def _on_crisis_reload(self, matcher: CrisisMatcher):
+        self.cache.model_version = self._cache_version()
 
     async def analyze_text(self, text: str) -> Dict[str, Any]:
         """Analyze text for emotions, sentiment, and risk level"""
         try:
-            # Clean and preprocess text
-            cleaned_text = self._preprocess_text(text)
-            
-            # Get emotion scores
-            emotions = self.emotion_analyzer(cleaned_text)
-            
-            # Get sentiment
-            sentiment = self.sentiment_analyzer(cleaned_text)
+            self.crisis_matcher.reload_if_changed()
+            cached = await self.cache.get(text)
+            if cached is not None:
+                return cached
             
-            # Assess risk level
-            risk_level = self._assess_risk_level(text, emotions)
-            
-            # Calculate mood score (1-10)
-            mood_score = self._calculate_mood_score(emotions, sentiment)
-            
-            # Map to emotion wheel
-            wheel_emotions = self._map_to_emotion_wheel(emotions)
-            
-            return {
-                "emotions": emotions,
-                "sentiment": sentiment,
-                "risk_level": risk_level,
-                "mood_score": mood_score,
-                "wheel_emotions": wheel_emotions,
-                "word_count": len(text.split()),
-                "detected_crisis_keywords": self._detect_crisis_keywords(text)
-            }
+            # Concurrent calls are coalesced into one batched forward pass
+            analysis = await self.batcher.submit(text)
+            await self.cache.set(text, analysis)
+            return analysis
             
+        except QueueFullError:
+            # Let the caller answer 503 instead of queueing without limit
+            raise
         except Exception as e:
             logger.error(f"Error analyzing text: {str(e)}")
             return {
@@ -87,6 +101,167 @@ class EmotionAnalyzer:
                 "mood_score": 5
             }
 
+    async def analyze_many(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Analyze several texts in one batched forward pass.
+
+        Results keep the input order; an item that fails carries an "error" key.
+        """
+        self.crisis_matcher.reload_if_changed()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        misses = []
+        for index, text in enumerate(texts):
+            cached = await self.cache.get(text)
+            if cached is not None:
+                results[index] = cached
+            else:
+                misses.append(index)
+        
+        if misses:
+            try:
+                analyses = await self.batcher.run_batch([texts[index] for index in misses])
+            except QueueFullError:
+                raise
+            except Exception as e:
+                # Retry one by one so a single bad input does not fail the rest
+                logger.error(f"Batch analysis failed, retrying items individually: {str(e)}")
+                analyses = []
+                for index in misses:
+                    try:
+                        analyses.extend(await self.batcher.run_batch([texts[index]]))
+                    except QueueFullError:
+                        raise
+                    except Exception as item_error:
+                        analyses.append({"error": str(item_error)})
+            
+            for index, analysis in zip(misses, analyses):
+                results[index] = analysis
+                if "error" not in analysis:
+                    await self.cache.set(texts[index], analysis)
+        
+        return results
+
+    async def close(self):
+        """Stop the batcher and release the inference pool and cache"""
+        await self.batcher.close()
+        await self.cache.close()
+        self.executor.shutdown(wait=False)
+
+    def analyze_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Run both pipelines once over a batch of texts"""
+        # Clean and preprocess text, splitting long entries into token windows
+        windows = []
+        for index, text in enumerate(texts):
+            for window_text, tokens in self._split_windows(self._preprocess_text(text)):
+                windows.append((index, window_text, tokens))
+        
+        # Get emotion scores and sentiment for every window in one pass
+        inputs = [window_text for _, window_text, _ in windows]
+        options = {
+            "batch_size": settings.inference_batch_max_size,
+            "truncation": True,
+            "top_k": None
+        }
+        batch_emotions = self.emotion_analyzer(inputs, **options)
+        batch_sentiment = self.sentiment_analyzer(inputs, **options)
+        
+        chunks = [[] for _ in texts]
+        for (index, window_text, tokens), emotions, sentiment in zip(windows, batch_emotions, batch_sentiment):
+            chunks[index].append((window_text, tokens, self._as_list(emotions), self._as_list(sentiment)))
+        
+        return [self._build_analysis(text, text_chunks) for text, text_chunks in zip(texts, chunks)]
+
+    def _split_windows(self, text: str) -> List[Tuple[str, int]]:
+        """Split text into overlapping windows that fit the model's token limit"""
+        tokenizer = self.emotion_analyzer.tokenizer
+        window = min(settings.inference_chunk_tokens, tokenizer.model_max_length - 2)
+        overlap = min(settings.inference_chunk_overlap_tokens, window // 2)
+        
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        if len(offsets) <= window:
+            return [(text, max(1, len(offsets)))]
+        
+        windows = []
+        for start in range(0, len(offsets), window - overlap):
+            end = min(start + window, len(offsets))
+            windows.append((text[offsets[start][0]:offsets[end - 1][1]], end - start))
+            if end == len(offsets):
+                break
+        
+        # Keep memory bounded by sampling evenly across very long entries
+        limit = max(1, settings.inference_max_chunks)
+        if len(windows) > limit:
+            if limit == 1:
+                return windows[:1]
+            step = (len(windows) - 1) / (limit - 1)
+            windows = [windows[round(i * step)] for i in range(limit)]
+        return windows
+
+    @staticmethod
+    def _as_list(result) -> List[Dict]:
+        """Per-input pipeline output as a list of label/score dicts"""
+        return result if isinstance(result, list) else [result]
+
+    @staticmethod
+    def _aggregate_scores(weighted_scores: List[Tuple[int, List[Dict]]]) -> List[Dict]:
+        """Token-length weighted average of per-window label scores, best first"""
+        totals: Dict[str, float] = {}
+        total_weight = sum(weight for weight, _ in weighted_scores) or 1
+        for weight, scores in weighted_scores:
+            for item in scores:
+                totals[item['label']] = totals.get(item['label'], 0.0) + weight * item['score']
+        
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+        return [{"label": label, "score": score / total_weight} for label, score in ranked]
+
+    def _build_analysis(self, text: str, chunks: List[Tuple[str, int, List[Dict], List[Dict]]]) -> Dict[str, Any]:
+        """Derive risk, mood and wheel emotions from per-window model output"""
+        # Only the top label is reported, as with the pipelines' default output
+        emotions = self._aggregate_scores([(tokens, chunk_emotions) for _, tokens, chunk_emotions, _ in chunks])[:1]
+        sentiment = self._aggregate_scores([(tokens, chunk_sentiment) for _, tokens, _, chunk_sentiment in chunks])[:1]
+        
+        # Find crisis phrases once and share the result
+        crisis_keywords = self._detect_crisis_keywords(text)
+        
+        # Assess risk level
+        risk_level = self._assess_risk_level(text, emotions, crisis_keywords)
+        
+        # Keep each window's risk so a distressing passage in a long,
+        # otherwise calm entry still raises the overall level
+        chunk_results = []
+        if len(chunks) > 1:
+            for index, (window_text, tokens, chunk_emotions, _) in enumerate(chunks):
+                top_emotion = chunk_emotions[:1]
+                # Phrases were matched on the full text above; windows overlap,
+                # so rescanning them would repeat that work several times over
+                chunk_risk = self._assess_risk_level(window_text, top_emotion, crisis_keywords=[])
+                chunk_results.append({
+                    "index": index,
+                    "tokens": tokens,
+                    "emotion": top_emotion[0]['label'] if top_emotion else None,
+                    "risk_level": chunk_risk
+                })
+                if RISK_LEVELS.index(chunk_risk) > RISK_LEVELS.index(risk_level):
+                    risk_level = chunk_risk
+        
+        # Calculate mood score (1-10)
+        mood_score = self._calculate_mood_score(emotions, sentiment)
+        
+        # Map to emotion wheel
+        wheel_emotions = self._map_to_emotion_wheel(emotions)
+        
+        analysis = {
+            "emotions": emotions,
+            "sentiment": sentiment,
+            "risk_level": risk_level,
+            "mood_score": mood_score,
+            "wheel_emotions": wheel_emotions,
+            "word_count": len(text.split()),
+            "detected_crisis_keywords": crisis_keywords
+        }
+        if chunk_results:
+            analysis["chunks"] = chunk_results
+        return analysis
+
     def _preprocess_text(self, text: str) -> str:
         """Clean and preprocess text for analysis"""
         # Remove extra whitespace
@@ -95,14 +270,15 @@ class EmotionAnalyzer:
         text = re.sub(r'[^\w\s.,!?;:\-\'\"]', '', text)
         return text
 
-    def _assess_risk_level(self, text: str, emotions: List[Dict]) -> str:
+    def _assess_risk_level(
+        self, text: str, emotions: List[Dict], crisis_keywords: Optional[List[str]] = None
+    ) -> str:
         """Assess risk level based on text content and emotions"""
-        text_lower = text.lower()
-        
         # Check for crisis keywords
-        crisis_found = any(keyword in text_lower for keyword in self.crisis_keywords)
+        if crisis_keywords is None:
+            crisis_keywords = self._detect_crisis_keywords(text)
         
-        if crisis_found:
+        if crisis_keywords:
             return "high"
         
         # Check emotion scores
@@ -165,9 +341,4 @@ class EmotionAnalyzer:
 
     def _detect_crisis_keywords(self, text: str) -> List[str]:
         """Detect crisis keywords in text"""
-        text_lower = text.lower()
-        found_keywords = [
-            keyword for keyword in self.crisis_keywords 
-            if keyword in text_lower
-        ]
-        return found_keywords
+        return self.crisis_matcher.find(text)
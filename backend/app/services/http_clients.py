@@ -0,0 +1,117 @@
+"""
+Application-scoped httpx clients, one per upstream, so outbound calls reuse
+pooled keep-alive connections instead of paying a TCP+TLS handshake each time.
+"""
+from typing import Any, Dict, Optional
+import time
+import logging
+import httpx
+from app.core.config import settings
+from app.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+def _upstream_specs() -> Dict[str, Dict[str, Any]]:
+    """Connection limits and timeouts per upstream"""
+    return {
+        "openrouter": {
+            "max_connections": settings.openrouter_max_connections,
+            "timeout": settings.openrouter_timeout_seconds,
+        },
+        "azure_speech": {
+            "max_connections": settings.azure_max_connections,
+            "timeout": settings.azure_timeout_seconds,
+        },
+        "azure_translator": {
+            "max_connections": settings.azure_max_connections,
+            "timeout": settings.azure_timeout_seconds,
+        },
+    }
+
+class HTTPClientManager:
+    """Create, share and close the pooled client for each upstream"""
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._latency: Dict[str, Histogram] = {}
+        self._errors: Dict[str, int] = {}
+        self._http2: Optional[bool] = None
+
+    def _http2_enabled(self) -> bool:
+        if self._http2 is None:
+            self._http2 = settings.http2_enabled
+            if self._http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("h2 package not installed; outbound HTTP/2 disabled")
+                    self._http2 = False
+        return self._http2
+
+    def _create(self, upstream: str) -> httpx.AsyncClient:
+        spec = _upstream_specs()[upstream]
+        latency = self._latency.setdefault(upstream, Histogram(LATENCY_BUCKETS_MS))
+        self._errors.setdefault(upstream, 0)
+
+        async def on_request(request: httpx.Request):
+            request.extensions["started_at"] = time.perf_counter()
+
+        async def on_response(response: httpx.Response):
+            # Time to response headers; streamed bodies are read afterwards
+            started_at = response.request.extensions.get("started_at")
+            if started_at is not None:
+                latency.observe((time.perf_counter() - started_at) * 1000)
+            if response.status_code >= 500:
+                self._errors[upstream] += 1
+
+        return httpx.AsyncClient(
+            http2=self._http2_enabled(),
+            limits=httpx.Limits(
+                max_connections=spec["max_connections"],
+                max_keepalive_connections=spec["max_connections"],
+                keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(spec["timeout"], connect=settings.http_connect_timeout_seconds),
+            event_hooks={"request": [on_request], "response": [on_response]},
+        )
+
+    def get(self, upstream: str) -> httpx.AsyncClient:
+        """Shared client for an upstream, created on first use"""
+        client = self._clients.get(upstream)
+        if client is None or client.is_closed:
+            client = self._create(upstream)
+            self._clients[upstream] = client
+        return client
+
+    def open(self):
+        """Create every upstream client up front"""
+        for upstream in _upstream_specs():
+            self.get(upstream)
+
+    async def close(self):
+        """Close every client and its pooled connections"""
+        clients, self._clients = self._clients, {}
+        for upstream, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing {upstream} HTTP client: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Limits and response-latency histogram per upstream"""
+        specs = _upstream_specs()
+        return {
+            upstream: {
+                "open": upstream in self._clients and not self._clients[upstream].is_closed,
+                "http2": bool(self._http2),
+                "max_connections": specs[upstream]["max_connections"],
+                "timeout_seconds": specs[upstream]["timeout"],
+                "server_errors": self._errors.get(upstream, 0),
+                "latency_ms": self._latency[upstream].snapshot() if upstream in self._latency else None,
+            }
+            for upstream in specs
+        }
+
+http_clients = HTTPClientManager()
@@ -0,0 +1,239 @@
+"""
+Background job queue. Jobs are JSON documents handed to a broker (Redis
+list via settings.redis_url, or an in-process queue) and run by a fixed
+number of consumer tasks with retries and exponential backoff.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import json
+import random
+import time
+import uuid
+import logging
+from app.core.config import settings
+from app.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+RUN_BUCKETS_MS = [10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+# handler(payload, final_attempt); raising retries the job until its last attempt
+JobHandler = Callable[[Dict[str, Any], bool], Awaitable[None]]
+
+class InMemoryBroker:
+    """Process-local broker; jobs do not survive a restart"""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        # Job id -> timer handle for retries waiting out their backoff
+        self._delayed: Dict[str, asyncio.TimerHandle] = {}
+
+    def _get_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    async def enqueue(self, job: Dict[str, Any], delay_seconds: float = 0.0):
+        if delay_seconds <= 0:
+            self._get_queue().put_nowait(job)
+            return
+        self._delayed[job["id"]] = asyncio.get_running_loop().call_later(delay_seconds, self._release, job)
+
+    def _release(self, job: Dict[str, Any]):
+        self._delayed.pop(job["id"], None)
+        self._get_queue().put_nowait(job)
+
+    async def dequeue(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self._get_queue().get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def depth(self) -> int:
+        return self._get_queue().qsize() + len(self._delayed)
+
+    async def close(self):
+        for handle in self._delayed.values():
+            handle.cancel()
+        self._delayed.clear()
+
+class RedisBroker:
+    """Redis list broker shared by every worker process; retries wait in a sorted set"""
+
+    def __init__(self, url: str, prefix: str = "jobs"):
+        import redis.asyncio as redis
+        self.redis = redis.from_url(url)
+        self.queue_key = f"{prefix}:queue"
+        self.delayed_key = f"{prefix}:delayed"
+
+    async def enqueue(self, job: Dict[str, Any], delay_seconds: float = 0.0):
+        raw = json.dumps(job, default=str)
+        if delay_seconds <= 0:
+            await self.redis.lpush(self.queue_key, raw)
+        else:
+            await self.redis.zadd(self.delayed_key, {raw: time.time() + delay_seconds})
+
+    async def _promote_due(self):
+        """Move retries whose backoff has elapsed onto the queue"""
+        due = await self.redis.zrangebyscore(self.delayed_key, 0, time.time(), start=0, num=100)
+        for raw in due:
+            # Only the process that removes the entry requeues it
+            if await self.redis.zrem(self.delayed_key, raw):
+                await self.redis.lpush(self.queue_key, raw)
+
+    async def dequeue(self, timeout: float) -> Optional[Dict[str, Any]]:
+        await self._promote_due()
+        item = await self.redis.brpop(self.queue_key, timeout=max(1, int(timeout)))
+        if item is None:
+            return None
+        return json.loads(item[1])
+
+    async def depth(self) -> int:
+        return await self.redis.llen(self.queue_key) + await self.redis.zcard(self.delayed_key)
+
+    async def close(self):
+        await self.redis.close()
+
+def create_broker():
+    """Broker selected by settings.job_broker"""
+    if settings.job_broker == "redis":
+        try:
+            return RedisBroker(settings.redis_url)
+        except ImportError:
+            logger.warning("redis package not installed; using in-memory job broker")
+    return InMemoryBroker()
+
+class JobQueue:
+    """Run registered job handlers from a broker with bounded concurrency"""
+
+    def __init__(
+        self,
+        broker=None,
+        concurrency: int = 4,
+        max_attempts: int = 3,
+        backoff_seconds: float = 2.0,
+        max_backoff_seconds: float = 60.0,
+    ):
+        self.broker = broker
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._consumers = []
+        self._running = False
+
+        self.submitted = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.run_ms = Histogram(RUN_BUCKETS_MS)
+
+    def register(self, name: str, handler: JobHandler):
+        self._handlers[name] = handler
+
+    async def submit(self, name: str, payload: Dict[str, Any]) -> str:
+        """Queue a job and return its id"""
+        if name not in self._handlers:
+            raise ValueError(f"No handler registered for job {name}")
+        if self.broker is None:
+            self.broker = create_broker()
+        job = {"id": uuid.uuid4().hex, "name": name, "payload": payload, "attempt": 1}
+        await self.broker.enqueue(job)
+        self.submitted += 1
+        return job["id"]
+
+    def start(self):
+        """Start the consumer tasks on the running loop"""
+        if self._running:
+            return
+        if self.broker is None:
+            self.broker = create_broker()
+        self._running = True
+        loop = asyncio.get_running_loop()
+        self._consumers = [loop.create_task(self._consume()) for _ in range(self.concurrency)]
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** (attempt - 1))
+        # Jitter so retries from a shared outage do not arrive together
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _consume(self):
+        while self._running:
+            try:
+                job = await self.broker.dequeue(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job broker error: {str(e)}")
+                await asyncio.sleep(1.0)
+                continue
+            if job is not None:
+                await self._run(job)
+
+    async def _run(self, job: Dict[str, Any]):
+        handler = self._handlers.get(job["name"])
+        if handler is None:
+            logger.error(f"Dropping job {job['id']}: no handler for {job['name']}")
+            self.failed += 1
+            return
+
+        attempt = job.get("attempt", 1)
+        final_attempt = attempt >= self.max_attempts
+        started = time.perf_counter()
+        try:
+            await handler(job["payload"], final_attempt)
+            self.completed += 1
+        except asyncio.CancelledError:
+            # Shutting down mid-job; hand it back so it is not lost
+            await self.broker.enqueue(job)
+            raise
+        except Exception as e:
+            if final_attempt:
+                self.failed += 1
+                logger.error(f"Job {job['name']} {job['id']} failed after {attempt} attempts: {str(e)}")
+            else:
+                self.retried += 1
+                delay = self._backoff(attempt)
+                logger.warning(f"Job {job['name']} {job['id']} attempt {attempt} failed, retrying in {delay:.1f}s: {str(e)}")
+                await self.broker.enqueue({**job, "attempt": attempt + 1}, delay_seconds=delay)
+        finally:
+            self.run_ms.observe((time.perf_counter() - started) * 1000)
+
+    async def close(self):
+        """Stop the consumers and release the broker"""
+        self._running = False
+        for task in self._consumers:
+            task.cancel()
+        for task in self._consumers:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._consumers = []
+        if self.broker is not None:
+            await self.broker.close()
+
+    async def stats(self) -> Dict[str, Any]:
+        try:
+            depth = await self.broker.depth() if self.broker is not None else 0
+        except Exception:
+            depth = None
+        return {
+            "broker": type(self.broker).__name__ if self.broker is not None else None,
+            "concurrency": self.concurrency,
+            "depth": depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "run_ms": self.run_ms.snapshot(),
+        }
+
+job_queue = JobQueue(
+    concurrency=settings.job_concurrency,
+    max_attempts=settings.job_max_attempts,
+    backoff_seconds=settings.job_backoff_seconds,
+    max_backoff_seconds=settings.job_max_backoff_seconds
+)
@@ -0,0 +1,247 @@
+"""
+Process-wide registry for the transformer pipelines used by the analyzers.
+Each pipeline is loaded once per process and shared by every router.
+
+torch and transformers are imported on first load so that importing the
+app (and serving /health or auth-only traffic) stays fast.
+"""
+from typing import Dict, Any, Optional
+import gc
+import importlib.util
+import os
+import threading
+import time
+import logging
+from app.core.config import settings
+from app.utils.helpers import hash_content
+from app.utils.metrics import process_memory
+
+logger = logging.getLogger(__name__)
+
+# name -> (task, model id)
+MODEL_SPECS = {
+    "sentiment": ("sentiment-analysis", "cardiffnlp/twitter-roberta-base-sentiment-latest"),
+    "emotion": ("text-classification", "j-hartmann/emotion-english-distilroberta-base"),
+}
+
+BACKENDS = ("transformers", "quantized", "onnx")
+
+class ModelRegistry:
+    """Load each pipeline once and hand out the shared instance"""
+
+    def __init__(self):
+        self._pipelines: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._analyzer = None
+        # Backend actually in use, resolved on first access
+        self._backend: Optional[str] = None
+
+        # not_loaded -> loading -> ready, or failed
+        self.status = "not_loaded"
+        self.error: Optional[str] = None
+        self.warmed_up = False
+
+    @property
+    def model_version(self) -> str:
+        """Short fingerprint of the configured model ids and the backend in use"""
+        models = "|".join(f"{name}={spec[1]}" for name, spec in sorted(MODEL_SPECS.items()))
+        return hash_content(f"{models}|{self.backend}")[:12]
+
+    @property
+    def backend(self) -> str:
+        """The configured backend, or transformers when it cannot run here"""
+        if self._backend is None:
+            self._backend = self._resolve_backend()
+        return self._backend
+
+    @staticmethod
+    def _resolve_backend() -> str:
+        backend = settings.inference_backend.lower()
+        if backend not in BACKENDS:
+            logger.warning(f"Unknown inference backend {backend!r}; using transformers")
+            return "transformers"
+        if backend == "onnx" and not _onnx_available():
+            logger.warning("optimum[onnxruntime] not installed; using transformers backend")
+            return "transformers"
+        return backend
+
+    def get_pipeline(self, name: str):
+        """Get a loaded pipeline by name, loading it on first use"""
+        if name in self._pipelines:
+            return self._pipelines[name]
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            if name not in self._pipelines:
+                self._pipelines[name] = self._load(name)
+        return self._pipelines[name]
+
+    def _load(self, name: str):
+        """Build a pipeline and record its load time and memory use"""
+        if name not in MODEL_SPECS:
+            raise KeyError(f"Unknown model: {name}")
+
+        import torch
+        from transformers import pipeline
+
+        task, model_id = MODEL_SPECS[name]
+        backend = self.backend
+        if backend == "quantized" and torch.cuda.is_available():
+            logger.warning("Dynamic quantization is CPU-only; using transformers backend")
+            backend = self._backend = "transformers"
+
+        started = time.perf_counter()
+        if backend == "onnx":
+            loaded = self._load_onnx(task, model_id)
+        else:
+            loaded = pipeline(
+                task,
+                model=model_id,
+                device=0 if torch.cuda.is_available() else -1
+            )
+            if backend == "quantized":
+                loaded.model = self._quantize(loaded.model)
+        load_time = time.perf_counter() - started
+
+        self._stats[name] = {
+            "model": model_id,
+            "task": task,
+            "backend": backend,
+            "load_time_seconds": round(load_time, 3),
+            "memory_bytes": self._model_memory(loaded.model),
+        }
+        logger.info(f"Loaded {name} model {model_id} ({backend}) in {load_time:.2f}s")
+        return loaded
+
+    @staticmethod
+    def _quantize(model):
+        """Dynamic int8 quantization of the Linear layers for CPU inference"""
+        import torch
+
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    @staticmethod
+    def _load_onnx(task: str, model_id: str):
+        """Export the model to ONNX and run it with ONNX Runtime"""
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        from transformers import AutoTokenizer, pipeline
+
+        options = onnxruntime.SessionOptions()
+        if settings.onnx_intra_op_threads:
+            options.intra_op_num_threads = settings.onnx_intra_op_threads
+        options.inter_op_num_threads = settings.onnx_inter_op_threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        model = ORTModelForSequenceClassification.from_pretrained(
+            model_id,
+            export=True,
+            session_options=options,
+            provider="CPUExecutionProvider"
+        )
+        tokenizer = AutoTokenizer.from_pretrained(model_id)
+        return pipeline(task, model=model, tokenizer=tokenizer)
+
+    @staticmethod
+    def _model_memory(model) -> int:
+        """Bytes held by the model's weights"""
+        import torch
+
+        if not hasattr(model, "state_dict"):
+            # ONNX Runtime keeps the weights inside the session
+            model_path = getattr(model, "model_path", None)
+            return os.path.getsize(model_path) if model_path and os.path.exists(model_path) else 0
+
+        def tensor_bytes(value) -> int:
+            # Quantized layers store packed (weight, bias) tuples
+            if isinstance(value, torch.Tensor):
+                return value.numel() * value.element_size()
+            if isinstance(value, (tuple, list)):
+                return sum(tensor_bytes(item) for item in value)
+            return 0
+
+        return sum(tensor_bytes(value) for value in model.state_dict().values())
+
+    def get_emotion_analyzer(self):
+        """Get the shared EmotionAnalyzer instance"""
+        if self._analyzer is None:
+            from app.services.emotion_analyzer import EmotionAnalyzer
+            with self._lock:
+                if self._analyzer is None:
+                    self.status = "loading"
+                    try:
+                        self._analyzer = EmotionAnalyzer(registry=self)
+                    except Exception as e:
+                        self.status = "failed"
+                        self.error = str(e)
+                        raise
+                    self.status = "ready"
+                    self.error = None
+        return self._analyzer
+
+    def warm_up(self):
+        """Load every model and run one inference to trigger lazy kernels"""
+        try:
+            analyzer = self.get_emotion_analyzer()
+            started = time.perf_counter()
+            analyzer.analyze_batch(["Warming up the emotion models before serving requests."])
+            self.warmed_up = True
+            logger.info(f"Model warm-up inference took {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logger.error(f"Model warm-up failed: {str(e)}")
+
+    def preload(self):
+        """Load and warm the models in a parent process before it forks workers.
+
+        Workers inherit the weights copy-on-write. Freezing the GC keeps the
+        collector from touching (and so copying) the objects loaded here.
+        Warm-up inference is left to each worker's lifespan hook: running it
+        here would start torch's OpenMP thread pool, which is not fork-safe.
+        """
+        before = process_memory()
+        try:
+            self.get_emotion_analyzer()
+        except Exception as e:
+            # Workers retry from their warm-up hook and report it on /ready
+            logger.error(f"Model preload failed; workers will load their own copies: {str(e)}")
+        gc.collect()
+        gc.freeze()
+        after = process_memory()
+        logger.info(
+            f"Preloaded models in pid {after['pid']}: "
+            f"RSS {before.get('rss_bytes', 0) // 2**20} MiB -> {after.get('rss_bytes', 0) // 2**20} MiB"
+        )
+
+    def readiness(self) -> Dict[str, Any]:
+        """Model status for the readiness probe"""
+        return {
+            "status": self.status,
+            "warmed_up": self.warmed_up,
+            "backend": self.backend,
+            "loaded_models": sorted(self._pipelines),
+            "error": self.error,
+        }
+
+    async def close(self):
+        """Release the shared analyzer's inference resources"""
+        if self._analyzer is not None:
+            await self._analyzer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-model load time and memory use"""
+        return {
+            "models": dict(self._stats),
+            "total_memory_bytes": sum(s["memory_bytes"] for s in self._stats.values()),
+            "process": process_memory(),
+        }
+
+def _onnx_available() -> bool:
+    """Whether optimum and onnxruntime are installed, without importing them"""
+    return all(importlib.util.find_spec(package) is not None for package in ("optimum", "onnxruntime"))
+
+model_registry = ModelRegistry()
+
+def get_emotion_analyzer():
+    """FastAPI dependency returning the process-wide EmotionAnalyzer"""
+    return model_registry.get_emotion_analyzer()
@@ -0,0 +1,170 @@
+"""
+Write-behind buffer for gamification counters. Increments to XP,
+words_learned and journal_entries_count are coalesced per user in memory
+and flushed to user_progress as one bulk_write on an interval or once
+enough users are pending.
+"""
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+from app.core.config import settings
+from app.database import get_database
+from app.services.progress_service import apply_progress, progress_pipeline
+from app.utils.helpers import ProgressCalculator
+
+logger = logging.getLogger(__name__)
+
+# Buffered field -> matching progress_pipeline argument
+BUFFERED_FIELDS = {
+    "total_xp": "xp",
+    "words_learned": "words_learned",
+    "journal_entries_count": "journal_entries",
+}
+
+class ProgressBuffer:
+    """Coalesce per-user progress increments and flush them in bulk"""
+
+    def __init__(self, enabled: bool, flush_interval_seconds: float, max_pending_users: int):
+        self.enabled = enabled
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending_users = max(1, max_pending_users)
+
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._inflight = set()
+
+        self.flushes = 0
+        self.flushed_users = 0
+        self.flush_errors = 0
+        self.dropped_users = 0
+
+    async def record(self, db, user_id: str, xp: int = 0, words_learned: int = 0, journal_entries: int = 0):
+        """Record progress, buffered when write-behind is enabled"""
+        if not self.enabled:
+            await apply_progress(db, user_id, xp=xp, words_learned=words_learned, journal_entries=journal_entries)
+            return
+
+        self._ensure_flusher()
+        deltas = self._pending.setdefault(user_id, {field: 0 for field in BUFFERED_FIELDS})
+        deltas["total_xp"] += xp
+        deltas["words_learned"] += words_learned
+        deltas["journal_entries_count"] += journal_entries
+
+        if len(self._pending) >= self.max_pending_users:
+            task = asyncio.get_running_loop().create_task(self.flush())
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    def merge(self, progress: Optional[Dict[str, Any]], user_id: str) -> Optional[Dict[str, Any]]:
+        """Progress document with this user's unflushed increments applied"""
+        deltas = self._pending.get(user_id)
+        if not deltas or progress is None:
+            return progress
+
+        merged = dict(progress)
+        for field, delta in deltas.items():
+            merged[field] = merged.get(field, 0) + delta
+        merged["current_level"] = ProgressCalculator.calculate_level(merged["total_xp"])
+        unlocked = ProgressCalculator.check_achievements(merged)
+        merged["achievements"] = list(merged.get("achievements") or []) + [
+            achievement for achievement in unlocked if achievement not in (merged.get("achievements") or [])
+        ]
+        return merged
+
+    def _ensure_flusher(self):
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            await self.flush()
+
+    async def flush(self):
+        """Write every pending increment in one bulk_write"""
+        if not self._pending:
+            return
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+
+            users = list(pending)
+            operations = [
+                UpdateOne(
+                    {"user_id": user_id},
+                    progress_pipeline(**{BUFFERED_FIELDS[field]: delta for field, delta in pending[user_id].items()}),
+                    upsert=True
+                )
+                for user_id in users
+            ]
+            try:
+                db = await get_database()
+            except Exception as e:
+                self.flush_errors += 1
+                logger.error(f"Progress flush of {len(operations)} users not sent: {str(e)}")
+                self._restore(pending)
+                return
+
+            try:
+                await db.user_progress.bulk_write(operations, ordered=False)
+                self.flushes += 1
+                self.flushed_users += len(operations)
+            except BulkWriteError as e:
+                # Unordered: every operation not listed in writeErrors was applied
+                failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                self.flushes += 1
+                self.flush_errors += 1
+                self.flushed_users += len(operations) - len(failed)
+                logger.error(f"Progress flush failed for {len(failed)} of {len(operations)} users: {str(e)}")
+                self._restore({users[index]: pending[users[index]] for index in failed})
+            except ServerSelectionTimeoutError as e:
+                # No server was reached, so nothing was written
+                self.flush_errors += 1
+                logger.error(f"Progress flush of {len(operations)} users not sent: {str(e)}")
+                self._restore(pending)
+            except Exception as e:
+                # The writes may or may not have been applied; retrying could
+                # count them twice, so drop them (the driver already retried
+                # once where the server supports retryable writes)
+                self.flush_errors += 1
+                self.dropped_users += len(operations)
+                logger.error(f"Progress flush of {len(operations)} users ended ambiguously, not retrying: {str(e)}")
+
+    def _restore(self, pending: Dict[str, Dict[str, int]]):
+        """Put unwritten increments back so the next flush retries them"""
+        for user_id, deltas in pending.items():
+            current = self._pending.setdefault(user_id, {field: 0 for field in BUFFERED_FIELDS})
+            for field, delta in deltas.items():
+                current[field] += delta
+
+    async def close(self):
+        """Stop the flusher and write what is left"""
+        if self._flusher and not self._flusher.done():
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending_users": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_users": self.flushed_users,
+            "flush_errors": self.flush_errors,
+            "dropped_users": self.dropped_users,
+        }
+
+progress_buffer = ProgressBuffer(
+    enabled=settings.progress_write_behind_enabled,
+    flush_interval_seconds=settings.progress_flush_interval_seconds,
+    max_pending_users=settings.progress_flush_max_users
+)
@@ -0,0 +1,92 @@
+"""
+Atomic updates to user_progress. Counters, streak, level and achievements
+are applied in a single find_one_and_update with an update pipeline, so
+concurrent submissions cannot lose increments or double-count a streak.
+"""
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import Any, Dict, Optional
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import logging
+from app.core.config import settings
+from app.utils.helpers import ProgressCalculator, local_day_start
+
+logger = logging.getLogger(__name__)
+
+def _field(name: str, default: Any = 0) -> Dict[str, Any]:
+    return {"$ifNull": [f"${name}", default]}
+
+def progress_pipeline(
+    xp: int = 0,
+    journal_entries: int = 0,
+    words_learned: int = 0,
+    record_activity: bool = False,
+    streak_xp: int = 0,
+    tz: Optional[ZoneInfo] = None,
+) -> list:
+    """Update pipeline applying counters, streak, level and achievements.
+
+    Streak days are calendar days in tz (the user's timezone, default UTC),
+    matching the activity heatmap.
+    """
+    now = datetime.utcnow()
+    tz = tz or ZoneInfo("UTC")
+    today_start = local_day_start(now, tz)
+    yesterday_start = local_day_start(now, tz, days_ago=1)
+
+    counters = {
+        "total_xp": {"$add": [_field("total_xp"), xp]},
+        "journal_entries_count": {"$add": [_field("journal_entries_count"), journal_entries]},
+        "words_learned": {"$add": [_field("words_learned"), words_learned]},
+        "current_streak": _field("current_streak"),
+        "longest_streak": _field("longest_streak"),
+        "achievements": _field("achievements", []),
+        "created_at": _field("created_at", now),
+        "updated_at": now,
+    }
+    stages = [{"$set": counters}]
+
+    if record_activity:
+        last_activity = _field("last_activity_date", datetime.min)
+        # First activity of the day: continue yesterday's streak or start over.
+        # Every expression in one $set sees the document before the stage.
+        advanced = {"$lt": [last_activity, today_start]}
+        stages.append({"$set": {
+            "current_streak": {"$cond": [
+                advanced,
+                {"$cond": [
+                    {"$gte": [last_activity, yesterday_start]},
+                    {"$add": ["$current_streak", 1]},
+                    1
+                ]},
+                "$current_streak"
+            ]},
+            "total_xp": {"$cond": [advanced, {"$add": ["$total_xp", streak_xp]}, "$total_xp"]},
+            "last_activity_date": {"$cond": [advanced, now, last_activity]},
+        }})
+        stages.append({"$set": {"longest_streak": {"$max": ["$longest_streak", "$current_streak"]}}})
+
+    stages.append({"$set": {"current_level": ProgressCalculator.level_expression("$total_xp")}})
+    stages.append({"$set": {"achievements": ProgressCalculator.achievements_expression()}})
+    return stages
+
+async def apply_progress(db, user_id: str, **changes) -> Dict[str, Any]:
+    """Apply progress changes in one round trip and return the updated document"""
+    pipeline = progress_pipeline(**changes)
+    try:
+        return await db.user_progress.find_one_and_update(
+            {"user_id": user_id},
+            pipeline,
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            maxTimeMS=settings.mongo_max_time_ms
+        )
+    except DuplicateKeyError:
+        # Two upserts raced to create the document; the loser now updates it
+        return await db.user_progress.find_one_and_update(
+            {"user_id": user_id},
+            pipeline,
+            return_document=ReturnDocument.AFTER,
+            maxTimeMS=settings.mongo_max_time_ms
+        )
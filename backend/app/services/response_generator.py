@@ -1,10 +1,39 @@
-import httpx
-from typing import Dict, Any, List
+from typing import AsyncIterator, Dict, Any, List
 from app.core.config import settings
+from app.services.http_clients import http_clients
+from app.utils.resilience import AdaptiveLimiter, CircuitBreaker, UpstreamGuard, UpstreamUnavailableError
+import asyncio
+import json
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+class UpstreamError(Exception):
+    """OpenRouter could not produce a response"""
+
+# Fall back at once while OpenRouter is failing, slow or saturated
+openrouter_guard = UpstreamGuard(
+    "openrouter",
+    CircuitBreaker(
+        failure_rate_threshold=settings.openrouter_breaker_failure_rate,
+        slow_call_ms=settings.openrouter_slow_call_seconds * 1000,
+        slow_call_rate_threshold=settings.openrouter_breaker_slow_call_rate,
+        window_size=settings.openrouter_breaker_window,
+        min_calls=settings.openrouter_breaker_min_calls,
+        open_seconds=settings.openrouter_breaker_open_seconds,
+    ),
+    AdaptiveLimiter(
+        initial_limit=settings.openrouter_concurrency_initial,
+        min_limit=settings.openrouter_concurrency_min,
+        max_limit=settings.openrouter_max_connections,
+        slow_call_ms=settings.openrouter_slow_call_seconds * 1000,
+    ),
+)
+
+def _is_upstream_failure(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
 class ResponseGenerator:
     def __init__(self):
         self.emergency_resources = {
@@ -25,8 +54,12 @@ class ResponseGenerator:
             }
         }
 
-    async def generate_response(self, journal_entry: str, emotion_analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate AI response to journal entry using OpenRouter (Claude)"""
+    async def generate_response(self, journal_entry: str, emotion_analysis: Dict[str, Any], raise_errors: bool = False) -> Dict[str, Any]:
+        """Generate AI response to journal entry using OpenRouter (Claude).
+
+        With raise_errors, an OpenRouter failure raises instead of falling
+        back, so a background job can retry it.
+        """
         try:
             risk_level = emotion_analysis.get('risk_level', 'low')
             
@@ -34,15 +67,15 @@ class ResponseGenerator:
                 return await self._generate_crisis_response(journal_entry, emotion_analysis)
             
             # Generate supportive response using OpenRouter (Claude)
-            response = await self._generate_supportive_response(journal_entry, emotion_analysis)
+            if raise_errors and settings.openrouter_api_key:
+                response = await self.request_supportive_response(journal_entry, emotion_analysis)
+            else:
+                response = await self._generate_supportive_response(journal_entry, emotion_analysis)
             
-            return {
-                'response': response,
-                'response_type': 'supportive',
-                'suggestions': self._generate_suggestions(emotion_analysis),
-                'risk_level': risk_level
-            }
+            return self.supportive_reply(response, emotion_analysis)
             
+        except UpstreamError:
+            raise
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             return {
@@ -51,8 +84,8 @@ class ResponseGenerator:
                 'error': str(e)
             }
 
-    async def _generate_supportive_response(self, journal_entry: str, emotion_analysis: Dict[str, Any]) -> str:
-        """Generate supportive response using OpenRouter (Claude via Anthropic API)"""
+    def _completion_request(self, journal_entry: str, emotion_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """URL, headers and body for an OpenRouter chat completion"""
         
         emotions = emotion_analysis.get('emotions', [])
         mood_score = emotion_analysis.get('mood_score', 5)
@@ -78,43 +111,154 @@ class ResponseGenerator:
         
         Focus on validation, emotional intelligence, and gentle guidance."""
 
+        return {
+            "url": f"{settings.openrouter_base_url}/chat/completions",
+            "headers": {
+                "Authorization": f"Bearer {settings.openrouter_api_key}",
+                "HTTP-Referer": "https://emolit.app",
+                "X-Title": "EmoLit",
+                "Content-Type": "application/json"
+            },
+            "json": {
+                "model": "anthropic/claude-3.5-sonnet",  # Using Claude via OpenRouter
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": context}
+                ],
+                "max_tokens": 300,
+                "temperature": 0.7
+            }
+        }
+
+    async def request_supportive_response(self, journal_entry: str, emotion_analysis: Dict[str, Any]) -> str:
+        """Supportive response from OpenRouter; raises UpstreamError on failure"""
+        try:
+            openrouter_guard.acquire()
+        except UpstreamUnavailableError as e:
+            raise UpstreamError(str(e)) from e
+        
+        started = time.perf_counter()
+        healthy = False
+        cancelled = False
+        try:
+            client = http_clients.get("openrouter")
+            # Use OpenRouter with Claude model (Anthropic-compatible endpoint)
+            response = await client.post(**self._completion_request(journal_entry, emotion_analysis))
+            healthy = not _is_upstream_failure(response.status_code)
+        except asyncio.CancelledError:
+            # The caller went away; that says nothing about OpenRouter
+            cancelled = True
+            raise
+        except Exception as e:
+            raise UpstreamError(f"OpenRouter request failed: {str(e)}") from e
+        finally:
+            if cancelled:
+                openrouter_guard.cancel()
+            else:
+                openrouter_guard.release(healthy, (time.perf_counter() - started) * 1000)
+        
+        if response.status_code != 200:
+            raise UpstreamError(f"OpenRouter API error: {response.status_code} - {response.text}")
+        data = response.json()
+        return data['choices'][0]['message']['content'].strip()
+
+    async def _generate_supportive_response(self, journal_entry: str, emotion_analysis: Dict[str, Any]) -> str:
+        """Generate supportive response using OpenRouter (Claude via Anthropic API)"""
         try:
             if settings.openrouter_api_key:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    # Use OpenRouter with Claude model (Anthropic-compatible endpoint)
-                    response = await client.post(
-                        f"{settings.openrouter_base_url}/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {settings.openrouter_api_key}",
-                            "HTTP-Referer": "https://emolit.app",
-                            "X-Title": "EmoLit",
-                            "Content-Type": "application/json"
-                        },
-                        json={
-                            "model": "anthropic/claude-3.5-sonnet",  # Using Claude via OpenRouter
-                            "messages": [
-                                {"role": "system", "content": system_prompt},
-                                {"role": "user", "content": context}
-                            ],
-                            "max_tokens": 300,
-                            "temperature": 0.7
-                        }
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        return data['choices'][0]['message']['content'].strip()
-                    else:
-                        logger.error(f"OpenRouter API error: {response.status_code} - {response.text}")
-                        return self._generate_fallback_response(emotion_analysis)
+                return await self.request_supportive_response(journal_entry, emotion_analysis)
             else:
                 # Fallback response when OpenRouter is not available
                 return self._generate_fallback_response(emotion_analysis)
                 
+        except UpstreamError as e:
+            logger.error(str(e))
+            return self._generate_fallback_response(emotion_analysis)
         except Exception as e:
             logger.error(f"OpenRouter API error: {str(e)}")
             return self._generate_fallback_response(emotion_analysis)
 
+    async def stream_supportive_response(self, journal_entry: str, emotion_analysis: Dict[str, Any]) -> AsyncIterator[str]:
+        """Yield the supportive response as it is generated (OpenRouter stream mode).
+
+        Yields the fallback response instead if the upstream fails before
+        sending any text; a failure mid-stream ends the reply early.
+        """
+        if not settings.openrouter_api_key:
+            yield self._generate_fallback_response(emotion_analysis)
+            return
+        
+        try:
+            openrouter_guard.acquire()
+        except UpstreamUnavailableError as e:
+            logger.warning(f"Skipping OpenRouter: {str(e)}")
+            yield self._generate_fallback_response(emotion_analysis)
+            return
+        
+        request = self._completion_request(journal_entry, emotion_analysis)
+        request["json"]["stream"] = True
+        sent_text = False
+        healthy = False
+        cancelled = False
+        started = time.perf_counter()
+        # Slow-call detection uses time to first token for streams
+        first_token_ms = None
+        try:
+            client = http_clients.get("openrouter")
+            async with client.stream("POST", **request) as response:
+                healthy = not _is_upstream_failure(response.status_code)
+                if response.status_code != 200:
+                    body = await response.aread()
+                    logger.error(f"OpenRouter API error: {response.status_code} - {body.decode(errors='replace')}")
+                else:
+                    async for line in response.aiter_lines():
+                        # Server-sent events; lines starting with ':' are keep-alive comments
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        choices = json.loads(data).get("choices") or [{}]
+                        delta = (choices[0].get("delta") or {}).get("content")
+                        if delta:
+                            if first_token_ms is None:
+                                first_token_ms = (time.perf_counter() - started) * 1000
+                            sent_text = True
+                            yield delta
+        except (asyncio.CancelledError, GeneratorExit):
+            # Cancelled, or the consumer closed the stream early
+            cancelled = True
+            raise
+        except Exception as e:
+            healthy = False
+            logger.error(f"OpenRouter streaming error: {str(e)}")
+        finally:
+            if cancelled:
+                openrouter_guard.cancel()
+            else:
+                elapsed_ms = first_token_ms if first_token_ms is not None else (time.perf_counter() - started) * 1000
+                openrouter_guard.release(healthy, elapsed_ms)
+        
+        if not sent_text:
+            yield self._generate_fallback_response(emotion_analysis)
+
+    def supportive_reply(self, response: str, emotion_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Response payload for a supportive reply"""
+        return {
+            'response': response,
+            'response_type': 'supportive',
+            'suggestions': self._generate_suggestions(emotion_analysis),
+            'risk_level': emotion_analysis.get('risk_level', 'low')
+        }
+
+    def interrupted_reply(self, partial: str, emotion_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Payload for a reply cut off before it finished: the text received
+        so far, or the fallback response if nothing had arrived"""
+        if partial:
+            return {**self.supportive_reply(partial, emotion_analysis), 'truncated': True}
+        fallback = self.supportive_reply(self._generate_fallback_response(emotion_analysis), emotion_analysis)
+        return {**fallback, 'response_type': 'fallback'}
+
     def _generate_fallback_response(self, emotion_analysis: Dict[str, Any]) -> str:
         """Generate fallback response when AI is unavailable"""
         emotions = emotion_analysis.get('emotions', [])
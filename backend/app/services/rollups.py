@@ -0,0 +1,144 @@
+"""
+Per-user daily rollups of journal activity, kept in the daily_rollups
+collection so dashboards read O(days) documents instead of every entry.
+
+Rebuild from existing entries with:
+
+    python -m app.services.rollups [user_id ...]
+
+The rebuild is safe while the app is serving: it rewrites only days that had
+ended in each user's timezone when it started, and leaves the current day to
+record_entry. Run it again a day later to complete the day it started on.
+"""
+from pymongo import ReplaceOne
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import sys
+import logging
+from app.core.config import settings
+from app.services.emotion_analyzer import RISK_LEVELS
+from app.utils.helpers import local_day, user_timezone
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 500
+
+def risk_rank(risk_level: Optional[str]) -> int:
+    """Position of a risk level in RISK_LEVELS; unknown levels rank lowest"""
+    return RISK_LEVELS.index(risk_level) if risk_level in RISK_LEVELS else 0
+
+def risk_label(rank: int) -> str:
+    return RISK_LEVELS[max(0, min(rank, len(RISK_LEVELS) - 1))]
+
+def rollup_update(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Upsert operators that fold one journal entry into its day's rollup"""
+    mood_score = entry.get("mood_score", 5)
+    inc = {
+        "entry_count": 1,
+        "word_count": entry.get("word_count", 0),
+        "mood_sum": mood_score,
+    }
+    for emotion in set(entry.get("detected_emotions") or []):
+        inc[f"wheel_emotions.{emotion}"] = 1
+
+    return {
+        "$inc": inc,
+        "$min": {"mood_min": mood_score},
+        "$max": {"mood_max": mood_score, "max_risk_rank": risk_rank(entry.get("risk_level"))},
+        "$set": {"updated_at": datetime.utcnow()},
+    }
+
+async def record_entry(db, user: Dict[str, Any], entry: Dict[str, Any]):
+    """Add a newly created journal entry to the user's daily rollup"""
+    day = local_day(entry["created_at"], user_timezone(user))
+    await db.daily_rollups.update_one(
+        {"user_id": entry["user_id"], "day": day},
+        rollup_update(entry),
+        upsert=True
+    )
+
+async def get_rollups(db, user_id: str, start_day: str, end_day: str) -> Dict[str, Dict[str, Any]]:
+    """Rollups for start_day..end_day inclusive, keyed by day"""
+    rollups = await db.daily_rollups.find(
+        {"user_id": user_id, "day": {"$gte": start_day, "$lte": end_day}},
+        {"_id": 0}
+    ).max_time_ms(settings.mongo_report_max_time_ms).to_list(length=None)
+    return {rollup["day"]: rollup for rollup in rollups}
+
+def _rollup_from_entries(user_id: str, day: str, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    moods = [entry.get("mood_score", 5) for entry in entries]
+    wheel_emotions: Dict[str, int] = {}
+    for entry in entries:
+        for emotion in set(entry.get("detected_emotions") or []):
+            wheel_emotions[emotion] = wheel_emotions.get(emotion, 0) + 1
+
+    return {
+        "user_id": user_id,
+        "day": day,
+        "entry_count": len(entries),
+        "word_count": sum(entry.get("word_count", 0) for entry in entries),
+        "mood_sum": sum(moods),
+        "mood_min": min(moods),
+        "mood_max": max(moods),
+        "wheel_emotions": wheel_emotions,
+        "max_risk_rank": max(risk_rank(entry.get("risk_level")) for entry in entries),
+        "updated_at": datetime.utcnow(),
+    }
+
+async def backfill_user(db, user: Dict[str, Any], before: Optional[datetime] = None) -> int:
+    """Rebuild one user's rollups from their journal entries.
+
+    Only days that had ended in the user's timezone by before (default now)
+    are replaced; later days are left to record_entry, whose live increments
+    a replace would overwrite.
+    """
+    user_id = str(user["_id"])
+    tz = user_timezone(user)
+    before = before or datetime.utcnow()
+    current_day = local_day(before, tz)
+    projection = {"created_at": 1, "word_count": 1, "mood_score": 1, "detected_emotions": 1, "risk_level": 1}
+
+    by_day: Dict[str, List[Dict[str, Any]]] = {}
+    async for entry in db.journal_entries.find({"user_id": user_id, "created_at": {"$lt": before}}, projection):
+        day = local_day(entry["created_at"], tz)
+        if day < current_day:
+            by_day.setdefault(day, []).append(entry)
+
+    operations = [
+        ReplaceOne({"user_id": user_id, "day": day}, _rollup_from_entries(user_id, day, entries), upsert=True)
+        for day, entries in by_day.items()
+    ]
+    for start in range(0, len(operations), BACKFILL_BATCH_SIZE):
+        await db.daily_rollups.bulk_write(operations[start:start + BACKFILL_BATCH_SIZE], ordered=False)
+    return len(operations)
+
+async def backfill(db, user_ids: Optional[List[str]] = None) -> int:
+    """Rebuild rollups for the given users, or for everyone, up to the day it started"""
+    from bson import ObjectId
+
+    # One start time for the whole run, so each user's cut-off is the same instant
+    started_at = datetime.utcnow()
+    query = {"_id": {"$in": [ObjectId(user_id) for user_id in user_ids]}} if user_ids else {}
+    total = 0
+    async for user in db.users.find(query, {"timezone": 1}):
+        days = await backfill_user(db, user, started_at)
+        total += days
+        logger.info(f"Rebuilt {days} daily rollups for user {user['_id']}")
+    return total
+
+async def _main(user_ids: List[str]):
+    from app.database import close_mongo_connection, connect_to_mongo, db as mongo
+
+    await connect_to_mongo()
+    if mongo.client is None:
+        sys.exit("Could not connect to MongoDB")
+    try:
+        total = await backfill(mongo.client[settings.database_name], user_ids or None)
+        print(f"Rebuilt {total} daily rollups")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(sys.argv[1:]))
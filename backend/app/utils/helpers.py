@@ -2,7 +2,8 @@ from typing import Dict, Any, List
 import re
 import hashlib
 import secrets
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import logging
 
 logger = logging.getLogger(__name__)
@@ -64,6 +65,22 @@ def time_ago(dt: datetime) -> str:
     else:
         return "Just now"
 
+def user_timezone(user: Dict[str, Any]) -> ZoneInfo:
+    """The user's configured timezone, falling back to UTC"""
+    try:
+        return ZoneInfo(user.get("timezone") or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+def local_day(dt: datetime, tz: ZoneInfo) -> str:
+    """Local calendar day (YYYY-MM-DD) of a naive UTC datetime"""
+    return dt.replace(tzinfo=timezone.utc).astimezone(tz).strftime("%Y-%m-%d")
+
+def local_day_start(dt: datetime, tz: ZoneInfo, days_ago: int = 0) -> datetime:
+    """Naive UTC start of the local calendar day of a naive UTC datetime, or of a day days_ago before it"""
+    day = dt.replace(tzinfo=timezone.utc).astimezone(tz).date() - timedelta(days=days_ago)
+    return datetime.combine(day, datetime.min.time(), tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
 def validate_email(email: str) -> bool:
     """Basic email validation"""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -81,6 +98,14 @@ def sanitize_filename(filename: str) -> str:
 class ProgressCalculator:
     """Calculate user progress and achievements"""
     
+    # (achievement id, progress field, default, minimum value)
+    ACHIEVEMENT_RULES = [
+        ('first_steps', 'journal_entries_count', 0, 1),
+        ('word_explorer', 'words_learned', 0, 10),
+        ('streak_master', 'longest_streak', 0, 7),
+        ('emotion_expert', 'current_level', 1, 5),
+    ]
+    
     @staticmethod
     def calculate_level(total_xp: int) -> int:
         """Calculate level based on XP"""
@@ -88,6 +113,11 @@ class ProgressCalculator:
         import math
         return max(1, int(math.sqrt(total_xp / 100)) + 1)
     
+    @staticmethod
+    def level_expression(total_xp: Any) -> Dict[str, Any]:
+        """calculate_level as a MongoDB aggregation expression"""
+        return {"$max": [1, {"$add": [{"$floor": {"$sqrt": {"$divide": [total_xp, 100]}}}, 1]}]}
+    
     @staticmethod
     def xp_for_next_level(current_level: int) -> int:
         """Calculate XP needed for next level"""
@@ -96,18 +126,18 @@ class ProgressCalculator:
     @staticmethod
     def check_achievements(progress_data: Dict[str, Any]) -> List[str]:
         """Check which achievements should be unlocked"""
-        achievements = []
-        
-        if progress_data.get('journal_entries_count', 0) >= 1:
-            achievements.append('first_steps')
-        
-        if progress_data.get('words_learned', 0) >= 10:
-            achievements.append('word_explorer')
-        
-        if progress_data.get('longest_streak', 0) >= 7:
-            achievements.append('streak_master')
-        
-        if progress_data.get('current_level', 1) >= 5:
-            achievements.append('emotion_expert')
-        
-        return achievements
\ No newline at end of file
+        return [
+            achievement
+            for achievement, field, default, minimum in ProgressCalculator.ACHIEVEMENT_RULES
+            if progress_data.get(field, default) >= minimum
+        ]
+    
+    @staticmethod
+    def achievements_expression() -> Dict[str, Any]:
+        """check_achievements as a MongoDB aggregation expression, merged with
+        the achievements already stored on the document"""
+        unlocked = [
+            {"$cond": [{"$gte": [{"$ifNull": [f"${field}", default]}, minimum]}, [achievement], []]}
+            for achievement, field, default, minimum in ProgressCalculator.ACHIEVEMENT_RULES
+        ]
+        return {"$setUnion": [{"$ifNull": ["$achievements", []]}, *unlocked]}
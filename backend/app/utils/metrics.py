@@ -0,0 +1,56 @@
+from typing import Dict, Any, List, Optional
+import bisect
+import os
+import threading
+
+class Histogram:
+    """Fixed-bucket histogram for tuning counters"""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record one observation"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += 1
+            self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Bucket counts keyed by upper bound"""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.total
+            value_sum = self.sum
+        buckets = {f"le_{bound:g}": count for bound, count in zip(self.buckets, counts)}
+        buckets["le_inf"] = counts[-1]
+        return {
+            "buckets": buckets,
+            "count": total,
+            "sum": round(value_sum, 3),
+            "mean": round(value_sum / total, 3) if total else 0.0,
+        }
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, Any]:
+    """Resident and proportional set size of a process (default this one), or peak RSS off Linux"""
+    pid = pid or os.getpid()
+    usage: Dict[str, Any] = {"pid": pid}
+    fields = {"Rss": "rss_bytes", "Pss": "pss_bytes", "Shared_Clean": "shared_clean_bytes", "Shared_Dirty": "shared_dirty_bytes"}
+    try:
+        # smaps_rollup splits out pages still shared with the parent after fork
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    usage[fields[name]] = int(value.split()[0]) * 1024
+    except OSError:
+        if pid != os.getpid():
+            return usage
+        import resource
+        usage["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return usage
@@ -0,0 +1,179 @@
+from collections import deque
+from typing import Any, Dict
+import time
+
+class UpstreamUnavailableError(Exception):
+    """Raised instead of calling an upstream that is failing or saturated"""
+
+class CircuitBreaker:
+    """Failure-rate and slow-call circuit breaker over a sliding window of calls.
+
+    closed: calls pass and outcomes are recorded. open: calls are rejected
+    until open_seconds have passed. half_open: a few probe calls pass; a
+    healthy probe closes the circuit and an unhealthy one reopens it.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        slow_call_ms: float = 10000.0,
+        slow_call_rate_threshold: float = 0.8,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_ms = slow_call_ms
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.min_calls = max(1, min_calls)
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+
+        self.state = "closed"
+        # (failed, slow) per call, newest last
+        self._window: deque = deque(maxlen=max(1, window_size))
+        self._opened_at = 0.0
+        self._probes = 0
+
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go to the upstream now"""
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+            self._probes = 0
+
+        if self.state == "half_open":
+            if self._probes >= self.half_open_max_calls:
+                self.rejected += 1
+                return False
+            self._probes += 1
+        return True
+
+    def cancel(self):
+        """Give back an allowed call that was never made"""
+        if self.state == "half_open" and self._probes:
+            self._probes -= 1
+
+    def record(self, success: bool, elapsed_ms: float):
+        """Record the outcome of an allowed call"""
+        slow = elapsed_ms >= self.slow_call_ms
+        if self.state == "half_open":
+            if success and not slow:
+                self.state = "closed"
+                self._window.clear()
+            else:
+                self._open()
+            return
+
+        self._window.append((not success, slow))
+        if len(self._window) < self.min_calls:
+            return
+        calls = len(self._window)
+        failure_rate = sum(failed for failed, _ in self._window) / calls
+        slow_rate = sum(slow for _, slow in self._window) / calls
+        if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._window.clear()
+        self.opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        calls = len(self._window)
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "failure_rate": round(sum(failed for failed, _ in self._window) / calls, 3) if calls else 0.0,
+            "slow_rate": round(sum(slow for _, slow in self._window) / calls, 3) if calls else 0.0,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit: grows by one per limit's worth of healthy
+    calls and shrinks by backoff_ratio on a failed or slow call"""
+
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 50,
+        backoff_ratio: float = 0.5,
+        slow_call_ms: float = 10000.0,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.backoff_ratio = backoff_ratio
+        self.slow_call_ms = slow_call_ms
+
+        self.inflight = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        """Take a slot without waiting"""
+        if self.inflight >= int(self.limit):
+            self.rejected += 1
+            return False
+        self.inflight += 1
+        return True
+
+    def cancel(self):
+        """Return a slot whose call was abandoned, leaving the limit as it is"""
+        self.inflight -= 1
+
+    def release(self, success: bool, elapsed_ms: float):
+        """Return a slot and adjust the limit from the call's outcome"""
+        self.inflight -= 1
+        if success and elapsed_ms < self.slow_call_ms:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        else:
+            self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "inflight": self.inflight,
+            "rejected": self.rejected,
+        }
+
+class UpstreamGuard:
+    """Circuit breaker and adaptive concurrency limit for one upstream"""
+
+    def __init__(self, name: str, breaker: CircuitBreaker, limiter: AdaptiveLimiter):
+        self.name = name
+        self.breaker = breaker
+        self.limiter = limiter
+
+    def acquire(self):
+        """Claim a call slot, or raise UpstreamUnavailableError at once"""
+        if not self.breaker.allow():
+            raise UpstreamUnavailableError(f"{self.name} circuit is open")
+        if not self.limiter.try_acquire():
+            self.breaker.cancel()
+            raise UpstreamUnavailableError(f"{self.name} concurrency limit reached")
+
+    def release(self, success: bool, elapsed_ms: float):
+        """Report the outcome of a call started with acquire()"""
+        self.limiter.release(success, elapsed_ms)
+        self.breaker.record(success, elapsed_ms)
+
+    def cancel(self):
+        """Give back a call started with acquire() that was abandoned before
+        its outcome was known, e.g. because the caller was cancelled"""
+        self.limiter.cancel()
+        self.breaker.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.stats(),
+            "concurrency": self.limiter.stats(),
+        }
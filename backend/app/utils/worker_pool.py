@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+import time
+from app.utils.metrics import Histogram
+
+QUEUE_WAIT_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 250, 500, 1000]
+
+class QueueFullError(Exception):
+    """Raised when a bounded queue already holds its maximum number of items"""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Work queue is full")
+        self.retry_after = retry_after
+
+class WorkerPool:
+    """Size-limited thread pool for blocking calls made from async code"""
+
+    def __init__(self, name: str, max_workers: int, max_queue_depth: int = 0, retry_after: int = 1):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        # 0 means unbounded
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.retry_after = retry_after
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self.run_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(*args) on the pool and wait for the result"""
+        if self.max_queue_depth and self.pending >= self.max_queue_depth:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after)
+
+        queued_at = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            self.queue_wait_ms.observe((started - queued_at) * 1000)
+            self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                self.running -= 1
+                self.run_ms.observe((time.perf_counter() - started) * 1000)
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and timing for capacity tuning"""
+        return {
+            "max_workers": self.max_workers,
+            "max_queue_depth": self.max_queue_depth,
+            "pending": self.pending,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "run_ms": self.run_ms.snapshot(),
+        }
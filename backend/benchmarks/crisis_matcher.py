@@ -0,0 +1,60 @@
+"""
+Crisis phrase detection on 10k-word entries: the original per-keyword
+substring scan against CrisisMatcher, for the shipped list and larger lists.
+
+    cd backend && python -m benchmarks.crisis_matcher
+"""
+import random
+import time
+from app.services import crisis_matcher as crisis_module
+from app.services.crisis_matcher import CrisisMatcher, DEFAULT_CRISIS_KEYWORDS
+
+WORDS = 10000
+RUNS = 50
+VOCAB = (
+    "i feel today the and was very tired work friends family happy sad walk "
+    "dinner talked about thinking really sleep anxious morning school"
+).split()
+
+def baseline(text: str, keywords):
+    """The scan EmotionAnalyzer used before CrisisMatcher"""
+    text_lower = text.lower()
+    return [keyword for keyword in keywords if keyword in text_lower]
+
+def timed_ms(fn, text: str) -> float:
+    fn(text)
+    started = time.perf_counter()
+    for _ in range(RUNS):
+        fn(text)
+    return (time.perf_counter() - started) / RUNS * 1000
+
+def main():
+    rng = random.Random(0)
+    text = " ".join(rng.choice(VOCAB) for _ in range(WORDS)) + " i just want to die"
+    filler = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(7)) for _ in range(2000)]
+
+    print(f"{'phrases':>8} {'baseline ms':>12} {'matcher ms':>11} {'scan ms':>8} {'automaton ms':>13}")
+    for count in (len(DEFAULT_CRISIS_KEYWORDS), 50, 150, 300, 1000):
+        extra = [" ".join(rng.sample(filler, 2)) for _ in range(count - len(DEFAULT_CRISIS_KEYWORDS))]
+        phrases = DEFAULT_CRISIS_KEYWORDS + extra
+        matcher = CrisisMatcher(phrases)
+        automaton = matcher._automaton
+        normalized = crisis_module._normalize(text)
+        print(
+            f"{count:>8} {timed_ms(lambda t: baseline(t, phrases), text):>12.2f}"
+            f" {timed_ms(matcher.find, text):>11.2f}"
+            f" {timed_ms(automaton._scan, normalized):>8.2f}"
+            f" {timed_ms(lambda t: walk(automaton, t), normalized):>13.2f}"
+        )
+
+def walk(automaton, text: str):
+    """Automaton search regardless of list size"""
+    limit = crisis_module.DIRECT_SCAN_MAX_PHRASES
+    crisis_module.DIRECT_SCAN_MAX_PHRASES = 0
+    try:
+        return automaton.search(text)
+    finally:
+        crisis_module.DIRECT_SCAN_MAX_PHRASES = limit
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Latency per outbound call against a local stub upstream: a new
+httpx.AsyncClient per call (how the services called OpenRouter and Azure
+before HTTPClientManager) against the shared pooled client, over plain HTTP
+and over TLS with a throwaway self-signed certificate. The stub answers at
+once, so the difference is connection setup.
+
+    cd backend && python -m benchmarks.http_clients
+"""
+import asyncio
+import datetime
+import ipaddress
+import os
+import ssl
+import statistics
+import tempfile
+import time
+import httpx
+from app.services.http_clients import HTTPClientManager
+
+CALLS = 200
+BODY = b'{"choices": [{"message": {"content": "ok"}}]}'
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Minimal keep-alive HTTP/1.1 responder"""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            if length:
+                await reader.readexactly(length)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(BODY)}\r\n\r\n".encode() + BODY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+def self_signed_certificate(directory: str):
+    """Certificate and key files for 127.0.0.1"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "stub-upstream")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(hours=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "stub.pem")
+    key_path = os.path.join(directory, "stub.key")
+    with open(cert_path, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+    return cert_path, key_path
+
+async def timed(call):
+    await call()
+    latencies = []
+    for _ in range(CALLS):
+        started = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99)]
+
+async def main():
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = self_signed_certificate(directory)
+        # Both clients trust the stub through the standard variable
+        os.environ["SSL_CERT_FILE"] = cert_path
+        server_tls = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_tls.load_cert_chain(cert_path, key_path)
+
+        print(f"{CALLS} sequential POSTs to a local stub")
+        print(f"{'scheme':>7} {'client':>16} {'p50 ms':>8} {'p99 ms':>8}")
+        for scheme, tls in (("http", None), ("https", server_tls)):
+            server = await asyncio.start_server(handle, "127.0.0.1", 0, ssl=tls)
+            url = f"{scheme}://127.0.0.1:{server.sockets[0].getsockname()[1]}/chat/completions"
+            manager = HTTPClientManager()
+
+            async def per_call():
+                async with httpx.AsyncClient(timeout=30.0) as client:
+                    (await client.post(url, json={"messages": []})).raise_for_status()
+
+            async def pooled():
+                (await manager.get("openrouter").post(url, json={"messages": []})).raise_for_status()
+
+            for name, call in (("client per call", per_call), ("pooled", pooled)):
+                p50, p99 = await timed(call)
+                print(f"{scheme:>7} {name:>16} {p50:>8.2f} {p99:>8.2f}")
+            await manager.close()
+            server.close()
+            await server.wait_closed()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""
+Load time, weight memory and inference latency of the emotion pipelines
+per inference backend. Each backend runs in its own process so memory
+figures do not include the previous backend's models.
+
+    cd backend && python -m benchmarks.inference_backends [backend ...]
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+BACKENDS = ("transformers", "quantized", "onnx")
+RUNS = 20
+TEXTS = [
+    "I finally finished the project and I feel proud of myself.",
+    "Today was long and boring, nothing really happened.",
+    "The exam tomorrow is making me really nervous.",
+    "We laughed all evening at the silliest jokes.",
+] * 4
+
+def measure(backend: str):
+    from app.core.config import settings
+    from app.services.model_registry import ModelRegistry
+
+    settings.inference_backend = backend
+    registry = ModelRegistry()
+    analyzer = registry.get_emotion_analyzer()
+    analyzer.analyze_batch(TEXTS[:1])
+
+    single, batch = [], []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        analyzer.analyze_batch(TEXTS[:1])
+        single.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        analyzer.analyze_batch(TEXTS)
+        batch.append((time.perf_counter() - started) * 1000 / len(TEXTS))
+
+    stats = registry.stats()
+    load_seconds = sum(model["load_time_seconds"] for model in stats["models"].values())
+    print(
+        f"{registry.backend:>12} {load_seconds:>8.1f} {stats['total_memory_bytes'] / 2**20:>11.0f}"
+        f" {stats['process'].get('rss_bytes', 0) / 2**20:>8.0f}"
+        f" {statistics.median(single):>10.1f} {statistics.median(batch):>13.1f}"
+    )
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--run":
+        measure(sys.argv[2])
+        return
+
+    print(f"{'backend':>12} {'load s':>8} {'weights MiB':>11} {'RSS MiB':>8} {'1 text ms':>10} {'ms/text x16':>13}")
+    for backend in sys.argv[1:] or BACKENDS:
+        subprocess.run([sys.executable, "-m", "benchmarks.inference_backends", "--run", backend], check=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Bytes and latency per journal list page: full documents trimmed in Python
+(the list path before LIST_PROJECTION) against the projection, for entries
+with a stored preview and for older entries without one. Needs the MongoDB
+server at TEST_DATABASE_URL; mongomock cannot evaluate the projection.
+
+    cd backend && TEST_DATABASE_URL=mongodb://localhost:27017 python -m benchmarks.journal_list
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.routes.journal import LIST_PROJECTION, PREVIEW_LENGTH, make_preview
+
+ENTRIES = 200
+PAGE_SIZE = 20
+PAGES = 50
+WORDS_PER_ENTRY = 2000
+VOCAB = (
+    "i feel today the and was very tired work friends family happy sad walk "
+    "dinner talked about thinking really sleep anxious morning school"
+).split()
+
+async def open_database():
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        sys.exit("Set TEST_DATABASE_URL to a MongoDB server")
+    client = AsyncIOMotorClient(url)
+    return client, client[f"emolit_bench_{uuid.uuid4().hex[:8]}"]
+
+def make_entry(rng: random.Random, user_id: str, created_at: datetime, stored_preview: bool):
+    content = " ".join(rng.choice(VOCAB) for _ in range(WORDS_PER_ENTRY))
+    chunks = [
+        {"index": i, "text": content[i * 500:(i + 1) * 500], "emotions": [{"label": "joy", "score": 0.5}] * 7}
+        for i in range(8)
+    ]
+    entry = {
+        "user_id": user_id,
+        "title": "An ordinary day",
+        "content": content,
+        "emotion_analysis": {"chunks": chunks, "emotions": [{"label": "joy", "score": 0.5}] * 7},
+        "detected_emotions": ["happy"],
+        "mood_score": 6,
+        "risk_level": "low",
+        "ai_response": {"message": "Thanks for sharing. " * 20},
+        "word_count": WORDS_PER_ENTRY,
+        "created_at": created_at,
+    }
+    if stored_preview:
+        entry["preview"] = make_preview(content)
+    return entry
+
+async def page(collection, user_id: str, projection, skip: int):
+    started = time.perf_counter()
+    entries = await (
+        collection.find({"user_id": user_id}, projection)
+        .sort([("created_at", -1), ("_id", -1)])
+        .skip(skip)
+        .limit(PAGE_SIZE)
+        .to_list(length=PAGE_SIZE)
+    )
+    if projection is None:
+        # The old list path cut the preview after loading the whole document
+        for entry in entries:
+            entry["preview"] = entry["content"][:PREVIEW_LENGTH]
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return elapsed_ms, sum(len(bson.encode(entry)) for entry in entries)
+
+async def main():
+    rng = random.Random(0)
+    client, database = await open_database()
+    try:
+        now = datetime.utcnow()
+        for stored_preview in (True, False):
+            user_id = f"bench-{stored_preview}"
+            await database.journal_entries.insert_many([
+                make_entry(rng, user_id, now - timedelta(minutes=i), stored_preview) for i in range(ENTRIES)
+            ])
+
+        print(f"{PAGES} pages of {PAGE_SIZE} entries, {WORDS_PER_ENTRY} words each")
+        print(f"{'entries':>16} {'query':>16} {'KiB/page':>9} {'p50 ms':>8}")
+        for stored_preview in (True, False):
+            label = "stored preview" if stored_preview else "no preview"
+            for name, projection in (("full documents", None), ("LIST_PROJECTION", LIST_PROJECTION)):
+                timings, sizes = [], []
+                for i in range(PAGES):
+                    elapsed_ms, size = await page(
+                        database.journal_entries, f"bench-{stored_preview}", projection,
+                        (i * PAGE_SIZE) % ENTRIES
+                    )
+                    timings.append(elapsed_ms)
+                    sizes.append(size)
+                print(f"{label:>16} {name:>16} {statistics.mean(sizes) / 1024:>9.1f} {statistics.median(timings):>8.2f}")
+    finally:
+        await client.drop_database(database.name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
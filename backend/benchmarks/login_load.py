@@ -0,0 +1,71 @@
+"""
+/health latency while a burst of logins is in flight, with bcrypt on the
+password pool against bcrypt run inline on the event loop (how login worked
+before the pool). In-process over ASGI with mongomock-motor.
+
+    cd backend && python -m benchmarks.login_load [logins]
+"""
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from datetime import datetime
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+from app.core.security import get_password_hash, pwd_context
+from app.database import db
+from app.main import app
+from app.routes import auth
+
+PASSWORD = "correct horse battery staple"
+PROBE_INTERVAL_SECONDS = 0.01
+IDLE_PROBES = 200
+
+async def verify_inline(plain_password: str, hashed_password: str):
+    """The login path before the pool: bcrypt on the event loop"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def health_during_logins(client: httpx.AsyncClient, logins: int):
+    tasks = [
+        asyncio.create_task(client.post("/api/auth/login", json={"email": "load@example.com", "password": PASSWORD}))
+        for _ in range(logins)
+    ]
+    # Probes go out on a fixed schedule and latency counts from the scheduled
+    # time, so a stalled event loop shows up as latency rather than as fewer probes
+    latencies = []
+    started = next_at = time.perf_counter()
+    while (tasks and not all(task.done() for task in tasks)) or (not tasks and len(latencies) < IDLE_PROBES):
+        next_at += PROBE_INTERVAL_SECONDS
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        await client.get("/health")
+        latencies.append((time.perf_counter() - next_at) * 1000)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99)], logins / elapsed
+
+async def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    db.database = AsyncMongoMockClient()["emolit_bench"]
+    await db.database.users.insert_one({
+        "email": "load@example.com",
+        "password_hash": get_password_hash(PASSWORD),
+        "is_active": True,
+        "created_at": datetime.utcnow(),
+    })
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        print(f"{logins} concurrent logins, bcrypt cost {pwd_context.handler('bcrypt').default_rounds}")
+        print(f"{'bcrypt':>16} {'health p50 ms':>14} {'health p99 ms':>14} {'logins/s':>9}")
+        p50, p99, _ = await health_during_logins(client, 0)
+        print(f"{'idle':>16} {p50:>14.1f} {p99:>14.1f} {'-':>9}")
+        p50, p99, rate = await health_during_logins(client, logins)
+        print(f"{'password pool':>16} {p50:>14.1f} {p99:>14.1f} {rate:>9.1f}")
+        auth.verify_and_update_password = verify_inline
+        p50, p99, rate = await health_during_logins(client, logins)
+        print(f"{'event loop':>16} {p50:>14.1f} {p99:>14.1f} {rate:>9.1f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Latency of get_current_user per authenticated request: a users lookup on
+every call, the user cache, and trusted token claims. Uses the MongoDB server
+at TEST_DATABASE_URL when set, otherwise mongomock-motor, which has no
+network round trip and so understates what the cache saves.
+
+    cd backend && TEST_DATABASE_URL=mongodb://localhost:27017 python -m benchmarks.user_cache
+"""
+import asyncio
+import os
+import statistics
+import time
+import uuid
+from fastapi.security import HTTPAuthorizationCredentials
+from app.core import security
+from app.core.config import settings
+from app.database import db
+
+CALLS = 2000
+
+async def open_database():
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(url)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    return client, client[f"emolit_bench_{uuid.uuid4().hex[:8]}"]
+
+async def timed(credentials, before_call=None):
+    latencies = []
+    for _ in range(CALLS):
+        if before_call:
+            before_call()
+        started = time.perf_counter()
+        await security.get_current_user(credentials)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99)]
+
+async def main():
+    client, database = await open_database()
+    db.database = database
+    try:
+        user_id = (await database.users.insert_one({"email": "bench@example.com", "is_active": True})).inserted_id
+        token = security.create_access_token({"sub": str(user_id), "email": "bench@example.com", "active": True})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        backend = "mongod" if os.getenv("TEST_DATABASE_URL") else "mongomock-motor"
+        print(f"{CALLS} calls against {backend}")
+        print(f"{'mode':>16} {'p50 ms':>8} {'p99 ms':>8}")
+        settings.auth_trust_token_claims = False
+        cases = [
+            ("users lookup", lambda: security.invalidate_cached_user(user_id)),
+            ("user cache", None),
+        ]
+        for name, before_call in cases:
+            p50, p99 = await timed(credentials, before_call)
+            print(f"{name:>16} {p50:>8.3f} {p99:>8.3f}")
+        settings.auth_trust_token_claims = True
+        p50, p99 = await timed(credentials)
+        print(f"{'token claims':>16} {p50:>8.3f} {p99:>8.3f}")
+        print(f"cache: {security.user_cache.stats()}")
+    finally:
+        await client.drop_database(database.name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Per-worker memory with the pre-fork preload (gunicorn.conf.py) against plain
+`uvicorn --workers N`. Starts each server, waits for every worker to finish
+startup, sends a few requests and reads RSS, PSS, Shared_Clean and
+Shared_Dirty from /proc/<pid>/smaps_rollup for each worker. Linux only.
+
+    cd backend && python -m benchmarks.worker_memory [workers]
+"""
+import os
+import signal
+import subprocess
+import sys
+import time
+import httpx
+from app.utils.metrics import process_memory
+
+PORT = 8765
+STARTUP_SECONDS = 120
+# Let background warm-up finish after the last "startup complete"
+SETTLE_SECONDS = 15
+
+def commands(workers: int):
+    bind = f"127.0.0.1:{PORT}"
+    return {
+        "gunicorn.conf.py": (
+            ["gunicorn", "app.main:app", "-c", "gunicorn.conf.py"],
+            {"WEB_CONCURRENCY": str(workers), "BIND": bind},
+        ),
+        "uvicorn --workers": (
+            ["uvicorn", "app.main:app", "--workers", str(workers), "--port", str(PORT)],
+            {},
+        ),
+    }
+
+def worker_pids(master: int):
+    """Child processes of the server, leaving out multiprocessing helpers"""
+    pids = []
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{pid}/cmdline") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        if parent == master and "resource_tracker" not in cmdline:
+            pids.append(int(pid))
+    return sorted(pids)
+
+def measure(name: str, command, env, workers: int):
+    server = subprocess.Popen(
+        command,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+    try:
+        deadline = time.monotonic() + STARTUP_SECONDS
+        while True:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{name} did not start within {STARTUP_SECONDS}s")
+            try:
+                if httpx.get(f"http://127.0.0.1:{PORT}/health", timeout=1).status_code == 200 \
+                        and len(worker_pids(server.pid)) == workers:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.5)
+        time.sleep(SETTLE_SECONDS)
+        for _ in range(workers * 4):
+            httpx.get(f"http://127.0.0.1:{PORT}/ready", timeout=10)
+
+        usage = [process_memory(pid) for pid in worker_pids(server.pid)]
+        master = process_memory(server.pid)
+        mib = lambda key: sum(item.get(key, 0) for item in usage) / len(usage) / 2**20
+        print(
+            f"{name:>18} {mib('rss_bytes'):>12.1f} {mib('pss_bytes'):>12.1f}"
+            f" {mib('shared_clean_bytes'):>19.1f} {mib('shared_dirty_bytes'):>19.1f}"
+            f" {sum(item.get('pss_bytes', 0) for item in usage + [master]) / 2**20:>16.1f}"
+        )
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=30)
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    print(f"{workers} workers, MiB")
+    print(f"{'server':>18} {'RSS/worker':>12} {'PSS/worker':>12} {'Shared_Clean/worker':>19} {'Shared_Dirty/worker':>19} {'PSS total+master':>16}")
+    for name, (command, env) in commands(workers).items():
+        measure(name, command, env, workers)
+
+if __name__ == "__main__":
+    main()
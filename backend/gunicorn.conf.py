@@ -0,0 +1,21 @@
+"""
+Gunicorn settings for multi-worker deployments.
+
+The emotion models are loaded once in the master process and shared with the
+workers copy-on-write. Run from the backend directory:
+
+    gunicorn app.main:app -c gunicorn.conf.py
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app in the master so the registry below is the one workers inherit
+preload_app = True
+
+def when_ready(server):
+    """Load the models before any worker is forked"""
+    from app.services.model_registry import model_registry
+    model_registry.preload()
@@ -0,0 +1,123 @@
+import os
+import time
+import uuid
+import pytest
+
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio client calls the app makes"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self.closed = False
+
+    async def get(self, key):
+        if key in self.expiry and self.expiry[key] <= time.monotonic():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        if ex:
+            self.expiry[key] = time.monotonic() + ex
+        return True
+
+    async def close(self):
+        self.closed = True
+
+class FailingRedis:
+    """Redis client whose every call fails, as during an outage"""
+
+    async def get(self, key):
+        raise ConnectionError("redis down")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis down")
+
+    async def close(self):
+        pass
+
+class FakeClock:
+    """Stand-in for the time module whose monotonic() only moves when told"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Install a FakeClock as the time module of the given modules"""
+    clock = FakeClock()
+
+    def install(*modules):
+        for module in modules:
+            monkeypatch.setattr(module, "time", clock)
+        return clock
+    return install
+
+@pytest.fixture
+async def mock_upstream(monkeypatch):
+    """Route an upstream's shared HTTP client to an httpx.MockTransport handler"""
+    import httpx
+    from app.services.http_clients import http_clients
+
+    clients = []
+
+    def install(upstream: str, handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        clients.append(client)
+        monkeypatch.setitem(http_clients._clients, upstream, client)
+        return client
+    yield install
+    for client in clients:
+        await client.aclose()
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+@pytest.fixture
+def failing_redis():
+    return FailingRedis()
+
+@pytest.fixture
+async def mongo_database():
+    """Scratch database on the MongoDB server at TEST_DATABASE_URL, dropped afterwards"""
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(url, serverSelectionTimeoutMS=5000)
+    name = f"emolit_test_{uuid.uuid4().hex[:8]}"
+    try:
+        yield client[name]
+    finally:
+        await client.drop_database(name)
+        client.close()
+
+@pytest.fixture
+async def memory_database():
+    """mongomock-motor database installed as the app's database"""
+    from mongomock_motor import AsyncMongoMockClient
+    from app.database import db
+
+    database = AsyncMongoMockClient()[f"emolit_test_{uuid.uuid4().hex[:8]}"]
+    previous = db.database
+    db.database = database
+    try:
+        yield database
+    finally:
+        db.database = previous
+
+@pytest.fixture
+async def api(memory_database):
+    """HTTP client for the app over ASGI, without running its lifespan"""
+    import httpx
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
@@ -0,0 +1,98 @@
+import pytest
+from app.services.analysis_cache import AnalysisCache
+from app.utils import cache as cache_module
+from app.utils.cache import LRUCache
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(cache_module)
+
+ANALYSIS = {"mood_score": 7, "risk_level": "low", "emotions": [{"label": "joy", "score": 0.9}]}
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_lru_expires_entries_after_ttl(clock):
+    cache = LRUCache(max_size=10, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_seconds=300)
+
+    clock.now += 61
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+async def test_local_tier_returns_copies():
+    cache = AnalysisCache("v1")
+    await cache.set("hello", ANALYSIS)
+
+    first = await cache.get("hello")
+    first["emotions"].append({"label": "anger", "score": 1.0})
+
+    assert await cache.get("hello") == ANALYSIS
+
+async def test_key_normalizes_whitespace_and_includes_model_version():
+    cache = AnalysisCache("v1")
+    assert cache.key_for("I feel  fine\n today") == cache.key_for(" I feel fine today ")
+    assert "v1" in cache.key_for("text")
+    assert cache.key_for("text") != AnalysisCache("v2").key_for("text")
+
+async def test_model_version_change_misses_old_entries(fake_redis):
+    cache = AnalysisCache("v1", redis_client=fake_redis)
+    await cache.set("hello", ANALYSIS)
+
+    cache.model_version = "v2"
+    assert await cache.get("hello") is None
+    assert cache.redis_misses == 1
+
+async def test_redis_tier_hit_and_miss_counters(fake_redis):
+    writer = AnalysisCache("v1", redis_client=fake_redis)
+    reader = AnalysisCache("v1", redis_client=fake_redis)
+
+    assert await reader.get("hello") is None
+    assert reader.redis_misses == 1
+
+    await writer.set("hello", ANALYSIS)
+    assert await reader.get("hello") == ANALYSIS
+    assert reader.redis_hits == 1
+
+    # Promoted into the local tier, so Redis is not asked again
+    assert await reader.get("hello") == ANALYSIS
+    assert reader.redis_hits == 1
+    assert reader.local.stats()["hits"] == 1
+
+    stats = reader.stats()["redis"]
+    assert stats == {"enabled": True, "hits": 1, "misses": 1, "errors": 0}
+
+async def test_redis_entries_get_the_cache_ttl(fake_redis):
+    cache = AnalysisCache("v1", ttl_seconds=120, redis_client=fake_redis)
+    await cache.set("hello", ANALYSIS)
+    assert list(fake_redis.expiry) == [cache.key_for("hello")]
+
+async def test_redis_errors_are_counted_and_not_raised(failing_redis):
+    cache = AnalysisCache("v1", redis_client=failing_redis)
+
+    await cache.set("hello", ANALYSIS)
+    assert cache.redis_errors == 1
+
+    # The local tier still serves the value
+    assert await cache.get("hello") == ANALYSIS
+
+    other = AnalysisCache("v1", redis_client=failing_redis)
+    assert await other.get("hello") is None
+    assert other.redis_errors == 1
+    assert other.redis_misses == 0
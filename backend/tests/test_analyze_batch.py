@@ -0,0 +1,55 @@
+import asyncio
+import threading
+from bson import ObjectId
+from app.core.config import settings
+from app.routes.emotions import BatchAnalysisRequest, analyze_batch_emotions
+from app.services.batcher import MicroBatcher
+
+USER = {"_id": ObjectId(), "email": "batch@example.com"}
+
+class BatchingAnalyzer:
+    """Analyzer stand-in that runs batches through a real MicroBatcher"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.batch_sizes = []
+        self.batcher = MicroBatcher(
+            self.process_batch,
+            max_batch_size=settings.inference_batch_max_size,
+            max_wait_ms=0,
+            max_concurrent_batches=2,
+            max_queue_depth=settings.inference_queue_depth,
+        )
+
+    def process_batch(self, texts):
+        if texts == ["held"]:
+            self.release.wait(5)
+        else:
+            self.batch_sizes.append(len(texts))
+        return [{"text": text, "risk_level": "low"} for text in texts]
+
+    async def analyze_text(self, text):
+        return await self.batcher.submit(text)
+
+    async def analyze_many(self, texts):
+        return await self.batcher.run_batch(texts)
+
+async def test_full_size_batch_runs_alongside_other_analyses():
+    analyzer = BatchingAnalyzer()
+    held = asyncio.create_task(analyzer.analyze_text("held"))
+    while analyzer.batcher.pending == 0:
+        await asyncio.sleep(0.001)
+    texts = [f"entry {index}" for index in range(settings.analyze_batch_max_items)]
+
+    try:
+        response = await analyze_batch_emotions(
+            BatchAnalysisRequest(texts=texts), stream=False, current_user=USER, emotion_analyzer=analyzer
+        )
+    finally:
+        analyzer.release.set()
+        await held
+        await analyzer.batcher.close()
+
+    assert response["count"] == len(texts)
+    assert [item["analysis"]["text"] for item in response["results"]] == texts
+    assert max(analyzer.batch_sizes) <= settings.inference_batch_max_size
@@ -0,0 +1,99 @@
+import asyncio
+import httpx
+import pytest
+from app.services import azure_speech
+from app.services.azure_speech import AzureSpeechTokenProvider
+
+class TokenEndpoint:
+    """issueToken stub that counts requests and numbers its tokens"""
+
+    def __init__(self, delay: float = 0.01, status_code: int = 200):
+        self.delay = delay
+        self.status_code = status_code
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        await asyncio.sleep(self.delay)
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, text="unavailable")
+        return httpx.Response(200, text=f"token-{len(self.requests)}")
+
+@pytest.fixture
+def endpoint(mock_upstream):
+    endpoint = TokenEndpoint()
+    mock_upstream("azure_speech", endpoint)
+    return endpoint
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(azure_speech)
+
+@pytest.fixture
+def provider():
+    return AzureSpeechTokenProvider(ttl_seconds=540, refresh_after_seconds=480)
+
+async def settle(provider):
+    """Wait for background refreshes to finish"""
+    await asyncio.gather(*provider._refreshes.values(), return_exceptions=True)
+
+async def test_concurrent_callers_share_one_request(endpoint, clock, provider):
+    tokens = await asyncio.gather(*[provider.get_token("eastus", "key") for _ in range(20)])
+
+    assert tokens == ["token-1"] * 20
+    assert len(endpoint.requests) == 1
+    assert endpoint.requests[0].url == "https://eastus.api.cognitive.microsoft.com/sts/v1.0/issueToken"
+    assert endpoint.requests[0].headers["Ocp-Apim-Subscription-Key"] == "key"
+
+async def test_fresh_token_is_served_from_cache(endpoint, clock, provider):
+    await provider.get_token("eastus", "key")
+    clock.now += 100
+
+    assert await provider.get_token("eastus", "key") == "token-1"
+    assert len(endpoint.requests) == 1
+    assert provider.stats()["hits"] == 1
+
+async def test_ageing_token_refreshes_in_background(endpoint, clock, provider):
+    await provider.get_token("eastus", "key")
+    clock.now += 500
+
+    # Still valid, so returned at once while the refresh runs
+    tokens = await asyncio.gather(*[provider.get_token("eastus", "key") for _ in range(5)])
+    assert tokens == ["token-1"] * 5
+    await settle(provider)
+
+    assert len(endpoint.requests) == 2
+    assert await provider.get_token("eastus", "key") == "token-2"
+
+async def test_expired_token_waits_for_a_new_one(endpoint, clock, provider):
+    await provider.get_token("eastus", "key")
+    clock.now += 600
+
+    assert await provider.get_token("eastus", "key") == "token-2"
+    assert len(endpoint.requests) == 2
+
+async def test_invalidated_token_is_reissued(endpoint, clock, provider):
+    await provider.get_token("eastus", "key")
+    provider.invalidate("eastus", "key")
+
+    assert await provider.get_token("eastus", "key") == "token-2"
+
+async def test_failed_issue_returns_none_once_for_all_callers(endpoint, clock, provider):
+    endpoint.status_code = 503
+
+    tokens = await asyncio.gather(*[provider.get_token("eastus", "key") for _ in range(10)])
+
+    assert tokens == [None] * 10
+    assert len(endpoint.requests) == 1
+    assert provider.stats()["failures"] == 1
+
+async def test_cancelled_caller_does_not_abort_shared_refresh(endpoint, clock, provider):
+    endpoint.delay = 0.05
+    first = asyncio.create_task(provider.get_token("eastus", "key"))
+    second = asyncio.create_task(provider.get_token("eastus", "key"))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "token-1"
+    assert first.cancelled()
+    assert len(endpoint.requests) == 1
@@ -0,0 +1,63 @@
+import os
+import pytest
+from app.services import crisis_matcher as crisis_module
+from app.services.crisis_matcher import CrisisMatcher, DEFAULT_CRISIS_KEYWORDS
+
+@pytest.fixture(params=["scan", "automaton"])
+def matcher(request, monkeypatch):
+    """Default matcher, run through both search strategies"""
+    if request.param == "automaton":
+        monkeypatch.setattr(crisis_module, "DIRECT_SCAN_MAX_PHRASES", 0)
+    return CrisisMatcher(DEFAULT_CRISIS_KEYWORDS)
+
+@pytest.mark.parametrize("text, phrase", [
+    ("I keep self harming", "self harm"),
+    ("I overdosed last night", "overdose"),
+    ("so many suicides this year", "suicide"),
+    ("Suicide.", "suicide"),
+    ("I just want to die", "want to die"),
+    ("I'd be better off dead", "better off dead"),
+])
+def test_inflected_forms_match(matcher, text, phrase):
+    assert matcher.find(text) == [phrase]
+
+def test_match_must_start_on_word_boundary(matcher):
+    assert matcher.find("a parasuicide study") == []
+    assert matcher.find("he said 'suicide' twice") == ["suicide"]
+
+def test_whitespace_and_case_are_normalized(matcher):
+    assert matcher.find("I want to\n\n  KILL   myself") == ["kill myself"]
+
+def test_every_phrase_reported_once_in_list_order(matcher):
+    text = "overdose, then suicide; suicide again and self harm"
+    assert matcher.find(text) == ["suicide", "self harm", "overdose"]
+
+def test_strategies_agree_on_large_lists(monkeypatch):
+    phrases = DEFAULT_CRISIS_KEYWORDS + [f"variant {i} phrase" for i in range(300)]
+    text = "variant 12 phrases and then self harmed, also variant 299 phrase"
+    automaton = crisis_module._Automaton(phrases)
+    assert automaton.search(text) == automaton._scan(text)
+    assert [phrases[i] for i in automaton.search(text)] == ["self harm", "variant 12 phrase", "variant 299 phrase"]
+
+def test_reload_swaps_phrases_and_notifies():
+    matcher = CrisisMatcher(["hopeless"])
+    versions = []
+    matcher.on_reload(lambda m: versions.append(m.version))
+    old_version = matcher.version
+
+    matcher.reload(["Give  Up", "give up", ""])
+    assert matcher.phrases == ["give up"]
+    assert matcher.find("I give up") == ["give up"]
+    assert matcher.find("hopeless") == []
+    assert versions == [matcher.version] and matcher.version != old_version
+
+def test_reloads_from_file_when_it_changes(tmp_path):
+    source = tmp_path / "crisis.txt"
+    source.write_text("# comment\nhopeless\n")
+    matcher = CrisisMatcher(source_path=str(source), reload_interval_seconds=0)
+    assert matcher.phrases == ["hopeless"]
+
+    source.write_text("worthless\n")
+    stat = source.stat()
+    os.utime(source, (stat.st_atime, stat.st_mtime + 10))
+    assert matcher.find("I feel worthless") == ["worthless"]
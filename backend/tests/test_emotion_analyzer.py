@@ -0,0 +1,48 @@
+from app.services.crisis_matcher import CrisisMatcher
+from app.services.emotion_analyzer import EmotionAnalyzer
+
+class CountingMatcher(CrisisMatcher):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def find(self, text):
+        self.calls += 1
+        return super().find(text)
+
+def make_analyzer():
+    """EmotionAnalyzer with post-processing only, no models loaded"""
+    analyzer = EmotionAnalyzer.__new__(EmotionAnalyzer)
+    analyzer.crisis_matcher = CountingMatcher()
+    analyzer.emotion_wheel_mapping = {"joy": "happy", "sadness": "sad"}
+    return analyzer
+
+def chunk(text, tokens, label, score):
+    return (text, tokens, [{"label": label, "score": score}], [{"label": "LABEL_1", "score": 0.9}])
+
+def test_long_entries_match_crisis_phrases_once():
+    analyzer = make_analyzer()
+    windows = ["a calm day at work", "then a walk", "and I want to die tonight"]
+    chunks = [chunk(window, 100, "joy", 0.9) for window in windows]
+
+    analysis = analyzer._build_analysis(" ".join(windows), chunks)
+
+    assert analyzer.crisis_matcher.calls == 1
+    assert analysis["risk_level"] == "high"
+    assert analysis["detected_crisis_keywords"] == ["want to die"]
+    # Window risk comes from its emotions; the phrase is reported for the entry
+    assert [c["risk_level"] for c in analysis["chunks"]] == ["low", "low", "low"]
+
+def test_distressed_window_raises_overall_risk():
+    analyzer = make_analyzer()
+    chunks = [
+        chunk("a calm day", 400, "joy", 0.95),
+        chunk("a calm evening", 400, "joy", 0.95),
+        chunk("everything hurts", 50, "sadness", 0.9),
+    ]
+
+    analysis = analyzer._build_analysis("a calm day a calm evening everything hurts", chunks)
+
+    assert analysis["emotions"][0]["label"] == "joy"
+    assert [c["risk_level"] for c in analysis["chunks"]] == ["low", "low", "medium"]
+    assert analysis["risk_level"] == "medium"
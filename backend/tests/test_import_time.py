@@ -0,0 +1,40 @@
+"""
+Importing app.main must stay cheap: no inference libraries, and under
+IMPORT_BUDGET_SECONDS. Runs in a fresh interpreter so earlier tests'
+imports do not count.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+IMPORT_BUDGET_SECONDS = 5.0
+HEAVY_MODULES = ("torch", "transformers", "optimum", "onnxruntime")
+
+PROFILE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "heavy": [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+def import_profile():
+    result = subprocess.run(
+        [sys.executable, "-c", PROFILE],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_app_import_skips_inference_libraries():
+    assert import_profile()["heavy"] == []
+
+def test_app_import_within_budget():
+    # Best of three so one slow start on a busy machine does not fail the run
+    seconds = min(import_profile()["seconds"] for _ in range(3))
+    assert seconds < IMPORT_BUDGET_SECONDS, f"import app.main took {seconds:.2f}s"
@@ -0,0 +1,43 @@
+"""
+Every query shape the routes issue must be planned on an index. Needs a
+real MongoDB server (TEST_DATABASE_URL); in-memory stand-ins cannot explain.
+"""
+from datetime import datetime
+from typing import Any, Dict, List
+import pytest
+from pymongo import DESCENDING
+from app.database import ensure_indexes
+
+NOW = datetime.utcnow()
+
+# (collection, filter, sort) for each query the routes issue
+QUERY_SHAPES = [
+    ("journal_entries", {"user_id": "probe"}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("journal_entries", {"user_id": "probe", "created_at": {"$gte": NOW, "$lt": NOW}}, None),
+    ("journal_entries", {"ai_response_status": {"$in": ["pending", "running", "retrying"]}, "updated_at": {"$lt": NOW}}, None),
+    ("user_progress", {"user_id": "probe"}, None),
+    ("users", {"email": "probe@example.com"}, None),
+    ("daily_rollups", {"user_id": "probe", "day": {"$gte": "2024-01-01", "$lte": "2024-12-31"}}, None),
+]
+
+def plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+@pytest.mark.parametrize("collection,query,sort", QUERY_SHAPES)
+async def test_route_query_uses_an_index(mongo_database, collection, query, sort):
+    created = await ensure_indexes(mongo_database)
+    assert created.get(collection), f"no indexes created on {collection}"
+
+    cursor = mongo_database[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    explained = await cursor.explain()
+
+    winning_plan = explained["queryPlanner"]["winningPlan"]
+    assert "COLLSCAN" not in plan_stages(winning_plan), f"{collection} {query} is a collection scan"
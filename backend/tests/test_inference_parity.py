@@ -0,0 +1,67 @@
+"""
+Quantized and ONNX pipelines against the fp32 transformers pipeline on a
+fixed corpus. Skipped unless torch (and optimum for ONNX) are installed and
+the models can be loaded.
+"""
+import pytest
+from app.core.config import settings
+from app.services.model_registry import MODEL_SPECS, ModelRegistry
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+CORPUS = [
+    "I finally finished the project and I feel proud of myself.",
+    "Today was long and boring, nothing really happened.",
+    "I am so angry that they cancelled on me again.",
+    "I miss my grandmother more than I can say.",
+    "The exam tomorrow is making me really nervous.",
+    "We laughed all evening at the silliest jokes.",
+    "I can't believe how disgusting the kitchen was.",
+    "What a surprise, my friends threw me a party!",
+    "I feel empty and tired of everything lately.",
+    "Walked the dog, cooked dinner, read a few pages.",
+    "Nobody listens to me and I am sick of it.",
+    "I'm grateful for the small quiet moments this week.",
+]
+
+# backend -> (minimum top-label agreement, maximum per-label score delta)
+TOLERANCES = {
+    "quantized": (0.9, 0.1),
+    "onnx": (1.0, 0.01),
+}
+
+def run_backend(backend: str, name: str):
+    """All label scores per corpus text from a fresh registry on a backend"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "inference_backend", backend)
+        registry = ModelRegistry()
+        if registry.backend != backend:
+            pytest.skip(f"{backend} backend is not available")
+        try:
+            pipeline = registry.get_pipeline(name)
+        except OSError as e:
+            pytest.skip(f"{MODEL_SPECS[name][1]} could not be loaded: {e}")
+    outputs = pipeline(CORPUS, top_k=None, truncation=True)
+    return [{item["label"]: item["score"] for item in scores} for scores in outputs]
+
+@pytest.fixture(scope="module")
+def reference():
+    return {name: run_backend("transformers", name) for name in MODEL_SPECS}
+
+@pytest.mark.parametrize("name", sorted(MODEL_SPECS))
+@pytest.mark.parametrize("backend", sorted(TOLERANCES))
+def test_backend_matches_transformers(reference, backend, name):
+    if backend == "onnx":
+        pytest.importorskip("optimum.onnxruntime")
+    min_agreement, max_delta = TOLERANCES[backend]
+
+    expected = reference[name]
+    actual = run_backend(backend, name)
+
+    agreement = sum(
+        max(want, key=want.get) == max(got, key=got.get) for want, got in zip(expected, actual)
+    ) / len(CORPUS)
+    delta = max(abs(want[label] - got[label]) for want, got in zip(expected, actual) for label in want)
+    assert agreement >= min_agreement, f"{backend} {name}: top label agreement {agreement:.2f}"
+    assert delta <= max_delta, f"{backend} {name}: max score delta {delta:.3f}"
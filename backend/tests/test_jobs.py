@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from app.services.jobs import InMemoryBroker, JobQueue
+
+@pytest.fixture
+async def make_queue():
+    queues = []
+
+    def make(**options) -> JobQueue:
+        queue = JobQueue(InMemoryBroker(), backoff_seconds=0.01, max_backoff_seconds=0.05, **options)
+        queues.append(queue)
+        return queue
+    yield make
+    for queue in queues:
+        await queue.close()
+
+async def wait_until(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+async def test_failing_job_is_retried_until_it_succeeds(make_queue):
+    queue = make_queue(max_attempts=3)
+    calls = []
+
+    async def flaky(payload, final_attempt):
+        calls.append(final_attempt)
+        if len(calls) < 3:
+            raise RuntimeError("upstream error")
+    queue.register("flaky", flaky)
+    queue.start()
+
+    await queue.submit("flaky", {})
+    await wait_until(lambda: queue.completed == 1)
+
+    assert calls == [False, False, True]
+    assert (queue.retried, queue.failed) == (2, 0)
+
+async def test_job_fails_after_its_last_attempt(make_queue):
+    queue = make_queue(max_attempts=3)
+    calls = []
+
+    async def broken(payload, final_attempt):
+        calls.append(final_attempt)
+        raise RuntimeError("still broken")
+    queue.register("broken", broken)
+    queue.start()
+
+    await queue.submit("broken", {})
+    await wait_until(lambda: queue.failed == 1)
+    await asyncio.sleep(0.1)
+
+    assert calls == [False, False, True]
+    assert (queue.completed, queue.retried, queue.failed) == (0, 2, 1)
+    assert await queue.broker.depth() == 0
+
+async def test_retries_wait_out_a_jittered_backoff(make_queue):
+    queue = make_queue()
+    queue.backoff_seconds, queue.max_backoff_seconds = 1.0, 3.0
+
+    for attempt, ceiling in [(1, 1.0), (2, 2.0), (3, 3.0), (6, 3.0)]:
+        delays = [queue._backoff(attempt) for _ in range(50)]
+        assert all(ceiling / 2 <= delay <= ceiling for delay in delays)
+        assert len(set(delays)) > 1
+
+async def test_delayed_job_is_held_back_until_due():
+    broker = InMemoryBroker()
+    await broker.enqueue({"id": "later", "name": "job", "payload": {}}, delay_seconds=0.05)
+
+    assert await broker.depth() == 1
+    assert await broker.dequeue(timeout=0.01) is None
+    assert (await broker.dequeue(timeout=0.5))["id"] == "later"
+    assert await broker.depth() == 0
+
+async def test_no_more_than_concurrency_handlers_run_at_once(make_queue):
+    queue = make_queue(concurrency=3)
+    running = peak = done = 0
+
+    async def slow(payload, final_attempt):
+        nonlocal running, peak, done
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        done += 1
+    queue.register("slow", slow)
+    queue.start()
+
+    for _ in range(12):
+        await queue.submit("slow", {})
+    await wait_until(lambda: done == 12)
+
+    assert peak == 3
+
+async def test_unregistered_job_is_rejected_on_submit(make_queue):
+    queue = make_queue()
+
+    with pytest.raises(ValueError):
+        await queue.submit("missing", {})
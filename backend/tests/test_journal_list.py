@@ -0,0 +1,26 @@
+"""
+The list projection must return only the preview, for entries with a stored
+preview and for older ones without. Needs a real MongoDB server
+(TEST_DATABASE_URL); mongomock cannot evaluate the projection.
+"""
+from datetime import datetime
+from app.routes.journal import LIST_PROJECTION, PREVIEW_LENGTH, make_preview
+
+async def test_list_projection_returns_preview_only(mongo_database):
+    long_content = "é" * (PREVIEW_LENGTH + 50)
+    await mongo_database.journal_entries.insert_many([
+        {"user_id": "u", "title": "stored", "content": long_content, "preview": make_preview(long_content),
+         "emotion_analysis": {"chunks": []}, "created_at": datetime.utcnow()},
+        {"user_id": "u", "title": "older long", "content": long_content, "created_at": datetime.utcnow()},
+        {"user_id": "u", "title": "older short", "content": "short day", "created_at": datetime.utcnow()},
+    ])
+
+    entries = await mongo_database.journal_entries.find({"user_id": "u"}, LIST_PROJECTION).to_list(length=10)
+
+    previews = {entry["title"]: entry["preview"] for entry in entries}
+    assert previews == {
+        "stored": make_preview(long_content),
+        "older long": make_preview(long_content),
+        "older short": "short day",
+    }
+    assert not any("content" in entry or "emotion_analysis" in entry for entry in entries)
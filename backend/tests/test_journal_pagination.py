@@ -0,0 +1,79 @@
+"""
+Keyset pagination of GET /journal/entries on mongomock. mongomock cannot
+evaluate the preview expression in LIST_PROJECTION (covered against a real
+server in test_journal_list.py), so these tests project the stored preview.
+"""
+import base64
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from app.routes import journal
+from app.routes.journal import get_journal_entries
+
+USER = {"_id": ObjectId(), "email": "pages@example.com"}
+NOW = datetime(2024, 5, 1, 12, 0)
+
+@pytest.fixture
+async def entries(memory_database, monkeypatch):
+    monkeypatch.setattr(journal, "LIST_PROJECTION", {**journal.LIST_PROJECTION, "preview": 1})
+    journal.entry_count_cache.clear()
+    # Three entries share a timestamp, so pages must split the tie on _id
+    created = [NOW, NOW, NOW, NOW - timedelta(hours=1), NOW - timedelta(hours=2)]
+    docs = [
+        {"user_id": str(USER["_id"]), "title": f"entry {index}", "preview": "...", "created_at": created_at}
+        for index, created_at in enumerate(created)
+    ]
+    docs.append({"user_id": "someone-else", "title": "other", "preview": "...", "created_at": NOW})
+    await memory_database.journal_entries.insert_many(docs)
+    expected = sorted(docs[:5], key=lambda doc: (doc["created_at"], doc["_id"]), reverse=True)
+    return [str(doc["_id"]) for doc in expected]
+
+async def list_page(**params):
+    return await get_journal_entries(**{"cursor": None, "limit": 10, "include_total": False, "skip": 0, **params}, current_user=USER)
+
+async def test_pages_split_timestamp_ties_on_id(entries):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = await list_page(cursor=cursor, limit=2)
+        seen.extend(entry["id"] for entry in page["entries"])
+        pages += 1
+        if not page["has_more"]:
+            break
+        cursor = page["next_cursor"]
+
+    assert seen == entries
+    assert pages == 3
+    assert page["next_cursor"] is None
+
+async def test_last_full_page_reports_no_more(entries):
+    first = await list_page(limit=3)
+    last = await list_page(cursor=first["next_cursor"], limit=2)
+
+    assert first["has_more"] is True
+    assert [entry["id"] for entry in last["entries"]] == entries[3:]
+    assert last["has_more"] is False
+    assert last["next_cursor"] is None
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"no separator").decode(),
+    base64.urlsafe_b64encode(b"2024-05-01T12:00:00|not-an-object-id").decode(),
+])
+async def test_malformed_cursor_is_rejected(entries, cursor):
+    with pytest.raises(HTTPException) as error:
+        await list_page(cursor=cursor)
+    assert error.value.status_code == 400
+
+async def test_total_is_cached_and_only_sent_when_asked(entries, memory_database):
+    assert (await list_page(limit=2))["total"] is None
+    assert (await list_page(limit=2, include_total=True))["total"] == 5
+
+    await memory_database.journal_entries.insert_one(
+        {"user_id": str(USER["_id"]), "title": "late", "preview": "...", "created_at": NOW}
+    )
+
+    # The count is cached briefly; listing still sees the new entry
+    page = await list_page(include_total=True)
+    assert page["total"] == 5
+    assert len(page["entries"]) == 6
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+import asyncio
+import httpx
+import pytest
+from bson import ObjectId
+from app.core.config import settings
+from app.routes import journal
+from app.routes.journal import JournalEntryCreate, create_journal_entry, requeue_stale_replies
+from app.services import response_generator as generator_module
+from app.services.jobs import InMemoryBroker, JobQueue, job_queue
+from app.utils.resilience import AdaptiveLimiter, CircuitBreaker, UpstreamGuard
+
+ANALYSIS = {"risk_level": "low", "mood_score": 5, "emotions": [{"label": "joy", "score": 0.8}], "wheel_emotions": ["happy"]}
+USER = {"_id": ObjectId(), "email": "replies@example.com", "timezone": "UTC"}
+
+class Analyzer:
+    async def analyze_text(self, text):
+        return dict(ANALYSIS)
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """Reply jobs handed to the queue, by entry id"""
+    entry_ids = []
+
+    async def submit(name, payload):
+        entry_ids.append(payload["entry_id"])
+        return "job"
+    monkeypatch.setattr(job_queue, "submit", submit)
+    return entry_ids
+
+async def test_reply_generated_inline_when_broker_is_down(memory_database, monkeypatch):
+    async def broker_down(name, payload):
+        raise ConnectionError("broker unreachable")
+    monkeypatch.setattr(job_queue, "submit", broker_down)
+    monkeypatch.setattr(settings, "openrouter_api_key", "")
+
+    created = await create_journal_entry(
+        JournalEntryCreate(content="Slept well."), async_reply=True, current_user=USER, emotion_analyzer=Analyzer()
+    )
+
+    saved = await memory_database.journal_entries.find_one({"_id": ObjectId(created["id"])})
+    assert created["ai_response_status"] == "done"
+    assert created["ai_response"]["response"]
+    assert created["ai_response"] == saved["ai_response"]
+    assert saved["ai_response_status"] == "done"
+
+async def test_queued_reply_is_returned_pending(memory_database, submitted):
+    created = await create_journal_entry(
+        JournalEntryCreate(content="Slept well."), async_reply=True, current_user=USER, emotion_analyzer=Analyzer()
+    )
+
+    assert created["ai_response_status"] == "pending"
+    assert created["ai_response"] is None
+    assert submitted == [created["id"]]
+
+async def test_sweep_requeues_only_stale_unfinished_replies(memory_database, submitted):
+    old = datetime.utcnow() - timedelta(seconds=settings.job_stale_seconds + 60)
+    entries = {
+        "stale_pending": {"ai_response_status": "pending", "updated_at": old},
+        "stale_retrying": {"ai_response_status": "retrying", "updated_at": old},
+        "fresh_pending": {"ai_response_status": "pending", "updated_at": datetime.utcnow()},
+        "done": {"ai_response_status": "done", "updated_at": old},
+        "inline": {"updated_at": old},
+    }
+    ids = {}
+    for name, doc in entries.items():
+        ids[name] = str((await memory_database.journal_entries.insert_one(dict(doc))).inserted_id)
+
+    assert await requeue_stale_replies() == 2
+    assert sorted(submitted) == sorted([ids["stale_pending"], ids["stale_retrying"]])
+    retrying = await memory_database.journal_entries.find_one({"_id": ObjectId(ids["stale_retrying"])})
+    assert retrying["ai_response_status"] == "pending"
+
+    # Claimed entries are fresh again, so a second sweep leaves them alone
+    assert await requeue_stale_replies() == 0
+    assert len(submitted) == 2
+
+async def test_sweep_survives_database_errors(monkeypatch, caplog):
+    async def no_database():
+        raise RuntimeError("database down")
+    monkeypatch.setattr(journal, "get_database", no_database)
+    monkeypatch.setattr(settings, "job_stale_seconds", 0.01)
+
+    sweeper = asyncio.create_task(journal.sweep_stale_replies())
+    await asyncio.sleep(0.05)
+    sweeper.cancel()
+    await asyncio.gather(sweeper, return_exceptions=True)
+
+    # The loop kept going after the first failure
+    assert caplog.text.count("database down") > 1
+
+async def test_reply_job_retries_then_falls_back_on_its_last_attempt(memory_database, mock_upstream, monkeypatch):
+    requests = []
+
+    async def overloaded(request):
+        requests.append(request)
+        return httpx.Response(503, text="overloaded")
+    mock_upstream("openrouter", overloaded)
+    monkeypatch.setattr(settings, "openrouter_api_key", "test-key")
+    monkeypatch.setattr(
+        generator_module, "openrouter_guard",
+        UpstreamGuard("openrouter", CircuitBreaker(min_calls=10), AdaptiveLimiter())
+    )
+    queue = JobQueue(InMemoryBroker(), max_attempts=3, backoff_seconds=0.01, max_backoff_seconds=0.05)
+    queue.register("generate_reply", journal._generate_reply_job)
+    monkeypatch.setattr(journal, "job_queue", queue)
+    queue.start()
+
+    try:
+        created = await create_journal_entry(
+            JournalEntryCreate(content="Slept well."), async_reply=True, current_user=USER, emotion_analyzer=Analyzer()
+        )
+        entry_id = ObjectId(created["id"])
+        saved = None
+        for _ in range(200):
+            saved = await memory_database.journal_entries.find_one({"_id": entry_id})
+            if saved["ai_response_status"] == "done":
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await queue.close()
+
+    assert created["ai_response_status"] == "pending"
+    assert saved["ai_response_status"] == "done"
+    assert saved["ai_response"]["response"]
+    assert "ai_response_error" not in saved
+    # Two attempts that raised for a retry, then a last one that fell back
+    assert len(requests) == 3
+    assert (queue.retried, queue.completed, queue.failed) == (2, 1, 0)
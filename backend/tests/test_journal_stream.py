@@ -0,0 +1,124 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+import httpx
+import pytest
+from bson import ObjectId
+from app.core.config import settings
+from app.routes import journal
+from app.routes.journal import JournalEntryCreate, create_journal_entry_streaming, requeue_stale_replies
+from app.services.jobs import job_queue
+
+ANALYSIS = {"risk_level": "low", "mood_score": 5, "emotions": [{"label": "joy", "score": 0.8}], "wheel_emotions": ["happy"]}
+USER = {"_id": ObjectId(), "email": "stream@example.com", "timezone": "UTC"}
+
+class Analyzer:
+    async def analyze_text(self, text):
+        return dict(ANALYSIS)
+
+class StreamingUpstream:
+    """OpenRouter stream stub sending the given fragments, then hanging if asked"""
+
+    def __init__(self, fragments, hang_after: bool = False):
+        self.fragments = fragments
+        self.hang_after = hang_after
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        async def body():
+            for text in self.fragments:
+                yield f'data: {json.dumps({"choices": [{"delta": {"content": text}}]})}\n\n'.encode()
+                await asyncio.sleep(0.01)
+            if self.hang_after:
+                await asyncio.sleep(60)
+            yield b"data: [DONE]\n\n"
+        return httpx.Response(200, headers={"Content-Type": "text/event-stream"}, content=body())
+
+@pytest.fixture
+def upstream(mock_upstream, monkeypatch):
+    monkeypatch.setattr(settings, "openrouter_api_key", "test-key")
+
+    def install(fragments, hang_after=False):
+        mock_upstream("openrouter", StreamingUpstream(fragments, hang_after))
+    return install
+
+async def start_stream(memory_database):
+    response = await create_journal_entry_streaming(
+        JournalEntryCreate(content="A long day, but a good one."), current_user=USER, emotion_analyzer=Analyzer()
+    )
+    events = response.body_iterator
+    entry = json.loads((await events.__anext__()).split("data: ", 1)[1])
+    return events, ObjectId(entry["id"])
+
+async def saved_reply(memory_database, entry_id):
+    saved = await memory_database.journal_entries.find_one({"_id": entry_id})
+    assert saved["ai_response_status"] == "done"
+    return saved["ai_response"]
+
+def parse(event: str):
+    name, data = event.strip().split("\n")
+    return name[len("event: "):], json.loads(data[len("data: "):])
+
+async def test_stream_sends_tokens_then_saves_reply(memory_database, upstream):
+    upstream(["Hello ", "there"])
+    events, entry_id = await start_stream(memory_database)
+
+    received = [parse(event) async for event in events]
+
+    assert received[:-1] == [("token", {"text": "Hello "}), ("token", {"text": "there"})]
+    assert received[-1][0] == "done"
+    assert received[-1][1]["ai_response"]["response"] == "Hello there"
+    assert (await saved_reply(memory_database, entry_id))["response"] == "Hello there"
+
+async def test_reply_is_saved_after_client_disconnects(memory_database, upstream):
+    upstream(["Hello ", "there"])
+    events, entry_id = await start_stream(memory_database)
+    replies = list(journal._reply_streams)
+
+    await events.aclose()
+    await asyncio.gather(*replies)
+
+    reply = await saved_reply(memory_database, entry_id)
+    assert reply["response"] == "Hello there"
+    assert "truncated" not in reply
+
+async def test_cut_off_reply_saves_partial_text(memory_database, upstream):
+    upstream(["Hello ", "there"], hang_after=True)
+    events, entry_id = await start_stream(memory_database)
+    assert parse(await events.__anext__()) == ("token", {"text": "Hello "})
+    await asyncio.sleep(0.05)
+
+    await journal.close_reply_streams()
+
+    reply = await saved_reply(memory_database, entry_id)
+    assert reply["response"] == "Hello there"
+    assert reply["truncated"] is True
+
+async def test_cut_off_before_any_text_saves_fallback(memory_database, upstream):
+    upstream([], hang_after=True)
+    events, entry_id = await start_stream(memory_database)
+    await asyncio.sleep(0.01)
+
+    await journal.close_reply_streams()
+
+    reply = await saved_reply(memory_database, entry_id)
+    assert reply["response_type"] == "fallback"
+    assert reply["response"]
+
+async def test_entry_left_running_by_a_dead_worker_is_requeued(memory_database, upstream, monkeypatch):
+    upstream(["Hello "], hang_after=True)
+    events, entry_id = await start_stream(memory_database)
+    assert (await memory_database.journal_entries.find_one({"_id": entry_id}))["ai_response_status"] == "running"
+    # As if the worker died mid-stream and the entry was left for a while
+    stale = datetime.utcnow() - timedelta(seconds=settings.job_stale_seconds + 1)
+    await memory_database.journal_entries.update_one({"_id": entry_id}, {"$set": {"updated_at": stale}})
+    submitted = []
+
+    async def submit(name, payload):
+        submitted.append(payload["entry_id"])
+    monkeypatch.setattr(job_queue, "submit", submit)
+
+    try:
+        assert await requeue_stale_replies() == 1
+        assert submitted == [str(entry_id)]
+    finally:
+        await journal.close_reply_streams()
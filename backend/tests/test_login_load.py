@@ -0,0 +1,45 @@
+"""
+A burst of logins must not stall unrelated requests on the same worker:
+bcrypt runs on the password pool, off the event loop.
+"""
+import asyncio
+import time
+from datetime import datetime
+from app.core.security import get_password_hash, verify_password
+
+LOGINS = 16
+PASSWORD = "correct horse battery staple"
+PROBE_INTERVAL_SECONDS = 0.01
+
+async def test_health_p99_stays_flat_during_logins(api, memory_database):
+    password_hash = get_password_hash(PASSWORD)
+    await memory_database.users.insert_one({
+        "email": "load@example.com",
+        "password_hash": password_hash,
+        "is_active": True,
+        "created_at": datetime.utcnow(),
+    })
+    started = time.perf_counter()
+    verify_password(PASSWORD, password_hash)
+    verify_ms = (time.perf_counter() - started) * 1000
+
+    logins = [
+        asyncio.create_task(api.post("/api/auth/login", json={"email": "load@example.com", "password": PASSWORD}))
+        for _ in range(LOGINS)
+    ]
+    # Latency counts from each probe's scheduled time, so a stalled event
+    # loop shows up as latency rather than as fewer probes
+    latencies = []
+    next_at = time.perf_counter()
+    while not all(login.done() for login in logins):
+        next_at += PROBE_INTERVAL_SECONDS
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        response = await api.get("/health")
+        latencies.append((time.perf_counter() - next_at) * 1000)
+        assert response.status_code == 200
+
+    assert [response.status_code for response in await asyncio.gather(*logins)] == [200] * LOGINS
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    # On the event loop every login would hold /health for a full bcrypt verify
+    assert p99 < verify_ms / 2, f"/health p99 {p99:.1f}ms during logins, bcrypt verify {verify_ms:.1f}ms"
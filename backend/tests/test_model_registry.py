@@ -0,0 +1,34 @@
+import pytest
+from app.core.config import settings
+from app.services import model_registry as registry_module
+from app.services.model_registry import ModelRegistry
+
+@pytest.fixture
+def backend(monkeypatch):
+    def configure(name: str, onnx_installed: bool = True):
+        monkeypatch.setattr(settings, "inference_backend", name)
+        monkeypatch.setattr(registry_module, "_onnx_available", lambda: onnx_installed)
+    return configure
+
+def test_onnx_without_optimum_reports_transformers(backend):
+    backend("transformers")
+    transformers_version = ModelRegistry().model_version
+
+    backend("onnx", onnx_installed=False)
+    registry = ModelRegistry()
+
+    assert registry.backend == "transformers"
+    assert registry.readiness()["backend"] == "transformers"
+    # Cached analyses from the fallback are the transformers model's
+    assert registry.model_version == transformers_version
+
+def test_model_version_tracks_backend(backend):
+    versions = set()
+    for name in ("transformers", "quantized", "onnx"):
+        backend(name)
+        versions.add(ModelRegistry().model_version)
+    assert len(versions) == 3
+
+def test_unknown_backend_uses_transformers(backend):
+    backend("tensorrt")
+    assert ModelRegistry().backend == "transformers"
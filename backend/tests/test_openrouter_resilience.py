@@ -0,0 +1,159 @@
+import asyncio
+import json
+import httpx
+import pytest
+from app.core.config import settings
+from app.services import response_generator as generator_module
+from app.services.http_clients import http_clients
+from app.services.response_generator import ResponseGenerator, UpstreamError
+from app.utils import resilience
+from app.utils.resilience import AdaptiveLimiter, CircuitBreaker, UpstreamGuard
+
+ANALYSIS = {"risk_level": "low", "mood_score": 5, "emotions": [{"label": "joy", "score": 0.8}]}
+
+class Upstream:
+    """OpenRouter stub whose responses can be switched between healthy,
+    failing and hanging"""
+
+    def __init__(self):
+        self.mode = "ok"
+        self.requests = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.mode == "hang":
+            await asyncio.sleep(60)
+        if self.mode == "fail":
+            return httpx.Response(503, text="overloaded")
+        if json.loads(request.content).get("stream"):
+            events = [
+                'data: {"choices": [{"delta": {"content": "Hello "}}]}',
+                'data: {"choices": [{"delta": {"content": "there"}}]}',
+                "data: [DONE]",
+            ]
+            return httpx.Response(200, text="\n\n".join(events) + "\n\n", headers={"Content-Type": "text/event-stream"})
+        return httpx.Response(200, json={"choices": [{"message": {"content": " A kind reply. "}}]})
+
+@pytest.fixture
+def upstream(mock_upstream, monkeypatch):
+    monkeypatch.setattr(settings, "openrouter_api_key", "test-key")
+    upstream = Upstream()
+    mock_upstream("openrouter", upstream)
+    return upstream
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(resilience)
+
+@pytest.fixture
+def guard(monkeypatch, clock):
+    guard = UpstreamGuard(
+        "openrouter",
+        CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4, open_seconds=30),
+        AdaptiveLimiter(initial_limit=4, max_limit=8),
+    )
+    monkeypatch.setattr(generator_module, "openrouter_guard", guard)
+    return guard
+
+@pytest.fixture
+def generator():
+    return ResponseGenerator()
+
+async def fail_until_open(generator, upstream, guard):
+    upstream.mode = "fail"
+    for _ in range(4):
+        with pytest.raises(UpstreamError):
+            await generator.request_supportive_response("entry", ANALYSIS)
+    assert guard.breaker.state == "open"
+
+async def test_failures_open_the_circuit(generator, upstream, guard):
+    await fail_until_open(generator, upstream, guard)
+
+    with pytest.raises(UpstreamError, match="circuit is open"):
+        await generator.request_supportive_response("entry", ANALYSIS)
+    assert upstream.requests == 4
+    assert guard.limiter.inflight == 0
+
+async def test_healthy_probe_closes_the_circuit(generator, upstream, guard, clock):
+    await fail_until_open(generator, upstream, guard)
+    clock.now += 31
+    upstream.mode = "ok"
+
+    assert await generator.request_supportive_response("entry", ANALYSIS) == "A kind reply."
+    assert guard.breaker.state == "closed"
+
+async def test_failed_probe_reopens_the_circuit(generator, upstream, guard, clock):
+    await fail_until_open(generator, upstream, guard)
+    clock.now += 31
+
+    with pytest.raises(UpstreamError, match="503"):
+        await generator.request_supportive_response("entry", ANALYSIS)
+    assert guard.breaker.state == "open"
+    assert guard.breaker.opened == 2
+
+async def test_half_open_admits_one_probe_at_a_time(generator, upstream, guard, clock):
+    await fail_until_open(generator, upstream, guard)
+    clock.now += 31
+    upstream.mode = "hang"
+
+    probe = asyncio.create_task(generator.request_supportive_response("entry", ANALYSIS))
+    await asyncio.sleep(0.01)
+    with pytest.raises(UpstreamError, match="circuit is open"):
+        await generator.request_supportive_response("entry", ANALYSIS)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    # The cancelled probe is handed back instead of counting as a failure
+    assert guard.breaker.state == "half_open"
+    upstream.mode = "ok"
+    assert await generator.request_supportive_response("entry", ANALYSIS) == "A kind reply."
+    assert guard.breaker.state == "closed"
+
+async def test_cancelled_call_records_no_outcome(generator, upstream, guard):
+    upstream.mode = "hang"
+    limit = guard.limiter.limit
+
+    call = asyncio.create_task(generator.request_supportive_response("entry", ANALYSIS))
+    await asyncio.sleep(0.01)
+    assert guard.limiter.inflight == 1
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    assert guard.limiter.inflight == 0
+    assert guard.limiter.limit == limit
+    assert guard.breaker.stats()["window_calls"] == 0
+
+async def test_client_error_releases_the_slot(generator, upstream, guard, monkeypatch):
+    def broken(upstream_name):
+        raise RuntimeError("client closed")
+    monkeypatch.setattr(http_clients, "get", broken)
+
+    with pytest.raises(UpstreamError, match="client closed"):
+        await generator.request_supportive_response("entry", ANALYSIS)
+    assert guard.limiter.inflight == 0
+
+async def test_stream_falls_back_while_the_circuit_is_open(generator, upstream, guard):
+    await fail_until_open(generator, upstream, guard)
+    upstream.mode = "ok"
+
+    chunks = [chunk async for chunk in generator.stream_supportive_response("entry", ANALYSIS)]
+
+    assert chunks == [generator._generate_fallback_response(ANALYSIS)]
+    assert upstream.requests == 4
+
+async def test_stream_yields_deltas_and_records_success(generator, upstream, guard):
+    chunks = [chunk async for chunk in generator.stream_supportive_response("entry", ANALYSIS)]
+
+    assert chunks == ["Hello ", "there"]
+    assert guard.limiter.inflight == 0
+    assert guard.breaker.stats()["window_calls"] == 1
+
+async def test_closed_stream_records_no_outcome(generator, upstream, guard):
+    stream = generator.stream_supportive_response("entry", ANALYSIS)
+    assert await stream.__anext__() == "Hello "
+    await stream.aclose()
+
+    assert guard.limiter.inflight == 0
+    assert guard.breaker.stats()["window_calls"] == 0
@@ -0,0 +1,86 @@
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError, ServerSelectionTimeoutError
+from app.services import progress_buffer as buffer_module
+from app.services.progress_buffer import ProgressBuffer
+
+class FailingProgress:
+    """user_progress collection whose bulk_write raises a given error"""
+
+    def __init__(self, error):
+        self.error = error
+        self.operations = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.operations = operations
+        raise self.error
+
+class Database:
+    def __init__(self, user_progress):
+        self.user_progress = user_progress
+
+@pytest.fixture
+def use_database(monkeypatch):
+    def install(database):
+        async def get_database():
+            return database
+        monkeypatch.setattr(buffer_module, "get_database", get_database)
+    return install
+
+async def buffered(*user_ids) -> ProgressBuffer:
+    buffer = ProgressBuffer(enabled=True, flush_interval_seconds=3600, max_pending_users=100)
+    for user_id in user_ids:
+        await buffer.record(None, user_id, xp=5, journal_entries=1)
+    return buffer
+
+async def test_flush_writes_coalesced_increments(use_database, memory_database):
+    use_database(memory_database)
+    buffer = await buffered("a", "b", "a")
+
+    await buffer.flush()
+
+    progress = await memory_database.user_progress.find_one({"user_id": "a"})
+    assert progress["total_xp"] == 10
+    assert progress["journal_entries_count"] == 2
+    assert buffer.stats()["pending_users"] == 0
+    assert buffer.flushed_users == 2
+    await buffer.close()
+
+async def test_bulk_write_error_requeues_only_failed_users(use_database):
+    error = BulkWriteError({
+        "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}],
+        "nInserted": 0, "nUpserted": 1, "nMatched": 1, "nModified": 1, "nRemoved": 0, "upserted": [],
+    })
+    use_database(Database(FailingProgress(error)))
+    buffer = await buffered("a", "b", "c")
+
+    await buffer.flush()
+
+    assert list(buffer._pending) == ["b"]
+    assert buffer._pending["b"]["total_xp"] == 5
+    assert buffer.flushed_users == 2
+    assert buffer.flush_errors == 1
+    buffer._pending.clear()
+    await buffer.close()
+
+async def test_unsent_flush_requeues_everything(use_database):
+    use_database(Database(FailingProgress(ServerSelectionTimeoutError("no servers"))))
+    buffer = await buffered("a", "b")
+    await buffer.record(None, "b", xp=5)
+
+    await buffer.flush()
+
+    assert {user_id: deltas["total_xp"] for user_id, deltas in buffer._pending.items()} == {"a": 5, "b": 10}
+    assert buffer.stats()["dropped_users"] == 0
+    buffer._pending.clear()
+    await buffer.close()
+
+async def test_ambiguous_flush_is_not_retried(use_database):
+    use_database(Database(FailingProgress(AutoReconnect("connection reset"))))
+    buffer = await buffered("a", "b")
+
+    await buffer.flush()
+
+    assert buffer._pending == {}
+    assert buffer.stats()["dropped_users"] == 2
+    assert buffer.flush_errors == 1
+    await buffer.close()
@@ -0,0 +1,115 @@
+"""
+Concurrent apply_progress calls for one user must not lose increments or
+advance the streak more than once a day. Runs on mongomock-motor, and on
+the MongoDB server at TEST_DATABASE_URL when set, where the updates really
+interleave.
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import pytest
+from app.database import ensure_indexes
+from app.services import progress_service
+from app.services.progress_service import apply_progress
+from app.utils.helpers import ProgressCalculator
+
+SUBMISSIONS = 50
+XP, STREAK_XP = 5, 10
+
+@pytest.fixture(params=["mongomock", "mongod"])
+async def database(request):
+    if request.param == "mongomock":
+        from mongomock_motor import AsyncMongoMockClient
+        yield AsyncMongoMockClient()["emolit_test"]
+        return
+    if not os.getenv("TEST_DATABASE_URL"):
+        pytest.skip("TEST_DATABASE_URL is not set")
+    database = request.getfixturevalue("mongo_database")
+    # The unique user_id index is what turns racing upserts into one document
+    await ensure_indexes(database)
+    yield database
+
+async def submit_concurrently(database, user_id: str):
+    await asyncio.gather(*[
+        apply_progress(
+            database, user_id, xp=XP, journal_entries=1, words_learned=1,
+            record_activity=True, streak_xp=STREAK_XP
+        )
+        for _ in range(SUBMISSIONS)
+    ])
+    return await database.user_progress.find_one({"user_id": user_id})
+
+def assert_derived_fields(progress):
+    assert progress["current_level"] == ProgressCalculator.calculate_level(progress["total_xp"])
+    assert sorted(progress["achievements"]) == sorted(ProgressCalculator.check_achievements(progress))
+
+async def test_first_activity_creates_one_document(database):
+    user_id = uuid.uuid4().hex
+
+    progress = await submit_concurrently(database, user_id)
+
+    assert await database.user_progress.count_documents({"user_id": user_id}) == 1
+    assert progress["total_xp"] == SUBMISSIONS * XP + STREAK_XP
+    assert progress["journal_entries_count"] == SUBMISSIONS
+    assert progress["words_learned"] == SUBMISSIONS
+    assert progress["current_streak"] == 1
+    assert progress["longest_streak"] == 1
+    assert_derived_fields(progress)
+
+async def test_streak_advances_once_per_day(database):
+    user_id = uuid.uuid4().hex
+    yesterday = datetime.utcnow() - timedelta(days=1)
+    await database.user_progress.insert_one({
+        "user_id": user_id,
+        "total_xp": 1400,
+        "journal_entries_count": 20,
+        "words_learned": 3,
+        "current_streak": 6,
+        "longest_streak": 6,
+        "last_activity_date": yesterday,
+        "achievements": ["first_steps"],
+    })
+
+    progress = await submit_concurrently(database, user_id)
+
+    assert progress["total_xp"] == 1400 + SUBMISSIONS * XP + STREAK_XP
+    assert progress["journal_entries_count"] == 20 + SUBMISSIONS
+    assert progress["current_streak"] == 7
+    assert progress["longest_streak"] == 7
+    assert progress["last_activity_date"].date() == datetime.utcnow().date()
+    # Crossing the thresholds unlocks word_explorer, streak_master and emotion_expert
+    assert {"word_explorer", "streak_master", "emotion_expert"} <= set(progress["achievements"])
+    assert_derived_fields(progress)
+
+# 21:00 on 11 March in Auckland (UTC+13)
+AUCKLAND_NOW = datetime(2024, 3, 11, 8, 0)
+
+class AucklandEvening(datetime):
+    @classmethod
+    def utcnow(cls):
+        return AUCKLAND_NOW
+
+@pytest.mark.parametrize("last_activity,streak", [
+    # 09:00 on the 11th in Auckland, though the 10th in UTC: already counted
+    (datetime(2024, 3, 10, 20, 0), 6),
+    # 01:00 on the 10th in Auckland, two UTC days ago: yesterday locally
+    (datetime(2024, 3, 9, 12, 0), 7),
+    # 23:00 on the 9th in Auckland: the streak was broken
+    (datetime(2024, 3, 9, 10, 0), 1),
+])
+async def test_streak_days_follow_the_user_timezone(database, monkeypatch, last_activity, streak):
+    monkeypatch.setattr(progress_service, "datetime", AucklandEvening)
+    user_id = uuid.uuid4().hex
+    await database.user_progress.insert_one({
+        "user_id": user_id, "total_xp": 100, "current_streak": 6, "longest_streak": 6,
+        "last_activity_date": last_activity,
+    })
+
+    progress = await apply_progress(
+        database, user_id, record_activity=True, streak_xp=STREAK_XP, tz=ZoneInfo("Pacific/Auckland")
+    )
+
+    assert progress["current_streak"] == streak
+    assert progress["total_xp"] == (100 if streak == 6 else 100 + STREAK_XP)
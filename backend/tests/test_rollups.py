@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+import pytest
+from app.services.rollups import backfill, record_entry
+
+NOW = datetime(2024, 3, 10, 15, 0)
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def utcnow(cls):
+        return NOW
+
+@pytest.fixture
+async def user(memory_database):
+    doc = {"email": "rollups@example.com", "timezone": "America/New_York"}
+    doc["_id"] = (await memory_database.users.insert_one(doc)).inserted_id
+    return doc
+
+async def add_entry(db, user, created_at, mood_score, emotions, risk_level="low", word_count=10):
+    entry = {
+        "user_id": str(user["_id"]),
+        "created_at": created_at,
+        "mood_score": mood_score,
+        "detected_emotions": emotions,
+        "risk_level": risk_level,
+        "word_count": word_count,
+    }
+    await db.journal_entries.insert_one(entry)
+    await record_entry(db, user, entry)
+
+async def rollups(db) -> dict:
+    return {
+        doc["day"]: doc
+        async for doc in db.daily_rollups.find({}, {"_id": 0, "updated_at": 0})
+    }
+
+async def test_backfill_matches_incremental_rollups(memory_database, user, monkeypatch):
+    # 02:00 UTC on the 9th is still the 8th in New York
+    await add_entry(memory_database, user, NOW - timedelta(days=1, hours=13), 3, ["sad"], "medium")
+    await add_entry(memory_database, user, NOW - timedelta(days=1), 7, ["happy", "sad"], word_count=25)
+    await add_entry(memory_database, user, NOW - timedelta(days=1, hours=2), 6, ["happy"])
+    await add_entry(memory_database, user, NOW - timedelta(days=4), 4, ["angry"], "high")
+    incremental = await rollups(memory_database)
+    assert sorted(incremental) == ["2024-03-06", "2024-03-08", "2024-03-09"]
+
+    await memory_database.daily_rollups.delete_many({})
+    monkeypatch.setattr("app.services.rollups.datetime", FrozenDatetime)
+    assert await backfill(memory_database) == 3
+
+    assert await rollups(memory_database) == incremental
+
+async def test_backfill_leaves_the_current_day_to_live_increments(memory_database, user, monkeypatch):
+    await add_entry(memory_database, user, NOW - timedelta(days=1), 5, ["happy"])
+    await add_entry(memory_database, user, NOW - timedelta(hours=2), 6, ["sad"])
+    # Today's rollup already counts an entry the backfill's scan will not see,
+    # as when record_entry lands between the scan and the write
+    await add_entry(memory_database, user, NOW - timedelta(hours=1), 8, ["happy"])
+    await memory_database.journal_entries.delete_many({"created_at": {"$gte": NOW - timedelta(hours=1)}})
+    today = (await rollups(memory_database))["2024-03-10"]
+
+    monkeypatch.setattr("app.services.rollups.datetime", FrozenDatetime)
+    assert await backfill(memory_database) == 1
+
+    assert today["entry_count"] == 2
+    assert (await rollups(memory_database))["2024-03-10"] == today
@@ -0,0 +1,50 @@
+from datetime import datetime
+import pytest
+from app.core import security
+from app.core.config import settings
+
+PASSWORD = "correct horse battery staple"
+
+@pytest.fixture
+async def user(memory_database):
+    result = await memory_database.users.insert_one({
+        "email": "tz@example.com",
+        "password_hash": security.get_password_hash(PASSWORD),
+        "is_active": True,
+        "timezone": "Pacific/Auckland",
+        "created_at": datetime.utcnow(),
+    })
+    yield result.inserted_id
+    security.invalidate_cached_user(str(result.inserted_id))
+
+@pytest.fixture
+def trust_claims(monkeypatch):
+    monkeypatch.setattr(settings, "auth_trust_token_claims", True)
+
+async def login(api) -> dict:
+    response = await api.post("/api/auth/login", json={"email": "tz@example.com", "password": PASSWORD})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def test_login_token_carries_timezone(api, user):
+    headers = await login(api)
+    claims = security.verify_token(headers["Authorization"].split()[1])
+    assert claims["tz"] == "Pacific/Auckland"
+
+async def test_activity_uses_timezone_from_claims(api, user, trust_claims, memory_database):
+    headers = await login(api)
+    # Trusted claims must not need the user document
+    await memory_database.users.delete_one({"_id": user})
+
+    response = await api.get("/api/progress/activity", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["timezone"] == "Pacific/Auckland"
+
+async def test_tokens_without_timezone_load_the_user(api, user, trust_claims):
+    token = security.create_access_token({"sub": str(user), "email": "tz@example.com", "active": True})
+
+    response = await api.get("/api/progress/activity", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.json()["timezone"] == "Pacific/Auckland"
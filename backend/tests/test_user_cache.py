@@ -0,0 +1,45 @@
+from datetime import datetime
+import pytest
+from app.core import security
+
+@pytest.fixture
+async def user_id(memory_database):
+    result = await memory_database.users.insert_one({
+        "email": "devices@example.com",
+        "is_active": True,
+        "timezone": "UTC",
+        "created_at": datetime.utcnow(),
+    })
+    security.user_cache.clear()
+    yield str(result.inserted_id)
+    security.invalidate_cached_user(str(result.inserted_id))
+
+def token_claims(user_id: str, issued_at: int) -> dict:
+    """Decoded claims of a token issued at the given time"""
+    return {"sub": user_id, "iat": issued_at}
+
+async def test_alternating_tokens_keep_their_own_entries(user_id, memory_database):
+    phone, web = token_claims(user_id, 1_700_000_000), token_claims(user_id, 1_700_000_600)
+    await security._load_user(phone)
+    await security._load_user(web)
+    # Every later load must come from the cache
+    await memory_database.users.delete_many({})
+
+    for _ in range(5):
+        assert (await security._load_user(phone))["email"] == "devices@example.com"
+        assert (await security._load_user(web))["email"] == "devices@example.com"
+
+async def test_invalidation_drops_every_token_entry(user_id, memory_database):
+    phone, web = token_claims(user_id, 1_700_000_000), token_claims(user_id, 1_700_000_600)
+    await security._load_user(phone)
+    await security._load_user(web)
+
+    await memory_database.users.update_one({"email": "devices@example.com"}, {"$set": {"is_active": False}})
+    security.invalidate_cached_user(user_id)
+
+    assert (await security._load_user(phone))["is_active"] is False
+    assert (await security._load_user(web))["is_active"] is False
+    # Reloaded copies are cached again
+    hits = security.user_cache.hits
+    await security._load_user(phone)
+    assert security.user_cache.hits - hits == 1